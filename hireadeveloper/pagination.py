@@ -0,0 +1,86 @@
+"""
+Pagination shared by the project, bid and developer lists
+"""
+
+from rest_framework import serializers
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination,
+)
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id), newest first.
+    No COUNT(*) and no OFFSET scan, so every page costs the same.
+    """
+
+    ordering = ("-created_at", "-id")
+
+    def get_ordering(self, request, queryset, view):
+        # not the view's OrderingFilter, see OptionalCursorPagination
+        return self.ordering
+
+
+class OptionalCursorPagination(BasePagination):
+    """
+    Page number pagination by default.
+    Switches to cursor pagination when the client sends ?pagination=cursor
+    or follows a ?cursor= link from a previous cursor page.
+    Cursor pages are always newest first, so a relevance ranked query
+    (?q=, ?skills=) or another ?ordering= is rejected in cursor mode
+    instead of silently losing its order.
+    """
+
+    mode_query_param = "pagination"
+    cursor_mode = "cursor"
+    ranked_query_params = ("q", "skills")
+
+    def __init__(self):
+        self.paginator = PageNumberPagination()
+
+    def use_cursor(self, request) -> bool:
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or CreatedAtCursorPagination.cursor_query_param in request.query_params
+        )
+
+    def check_cursor_order(self, request) -> None:
+        ranked = [p for p in self.ranked_query_params if request.query_params.get(p)]
+        if ranked:
+            raise serializers.ValidationError(
+                {
+                    self.mode_query_param: f"Cursor pagination cannot be combined "
+                    f"with {', '.join(ranked)}, use page numbers."
+                },
+                code="invalid_pagination",
+            )
+        ordering = request.query_params.get("ordering", "").strip()
+        if ordering and ordering != CreatedAtCursorPagination.ordering[0]:
+            raise serializers.ValidationError(
+                {
+                    self.mode_query_param: "Cursor pages are ordered by -created_at, "
+                    "use page numbers for another ordering."
+                },
+                code="invalid_pagination",
+            )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.check_cursor_order(request)
+            self.paginator = CreatedAtCursorPagination()
+        return self.paginator.paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, "display_page_controls", False)
+
+    def to_html(self):
+        return self.paginator.to_html()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 import dj_database_url
 from corsheaders.defaults import default_headers
@@ -45,10 +46,10 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Third party apps
     "rest_framework",
     "rest_framework_simplejwt",
-    "rest_framework_simplejwt.token_blacklist",
     "rest_framework.authtoken",
     "corsheaders",
     "cloudinary",
@@ -125,6 +126,50 @@ db_config = dj_database_url.config(default=config("DATABASE_URL"))
 DATABASES = {"default": db_config}
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# local development uses a per-process cache,
+# production and staging use Redis when CACHE_LOCATION is set (see their settings)
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", ""),
+    }
+}
+
+
+# Password hashing, the first hasher of the tier encodes new passwords.
+# argon2 needs argon2-cffi, its defaults follow the OWASP minimum
+# (19 MiB, 2 passes, 1 lane) to favour login throughput per core.
+PASSWORD_HASHER_TIERS = {
+    "pbkdf2": [
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "users.hashers.TunedArgon2PasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+        "django.contrib.auth.hashers.ScryptPasswordHasher",
+    ],
+    "argon2": [
+        "users.hashers.TunedArgon2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+        "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+        "django.contrib.auth.hashers.ScryptPasswordHasher",
+    ],
+}
+PASSWORD_HASHER = config("PASSWORD_HASHER", "pbkdf2")
+PASSWORD_HASHERS = PASSWORD_HASHER_TIERS[PASSWORD_HASHER]
+ARGON2_TIME_COST = config("ARGON2_TIME_COST", 2, cast=int)
+ARGON2_MEMORY_COST = config("ARGON2_MEMORY_COST", 19456, cast=int)
+ARGON2_PARALLELISM = config("ARGON2_PARALLELISM", 1, cast=int)
+# size of the pool async login/registration hash passwords in
+PASSWORD_HASHING_THREADS = config(
+    "PASSWORD_HASHING_THREADS", os.cpu_count() or 1, cast=int
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -170,7 +215,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
@@ -191,9 +236,16 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": False,
+    # revocation by users.revocation instead of the token_blacklist tables
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.TokenObtainSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.TokenRefreshSerializer",
 }
 
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# console/filebased backends for local runs and tests,
+# mail is sent by the send_outbox worker, never during a request
+EMAIL_BACKEND = config("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_FILE_PATH = config("EMAIL_FILE_PATH", str(BASE_DIR / "sent_emails"))
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", 30, cast=int)
 
 # sendgrid settings
 EMAIL_HOST = "smtp.gmail.com"
@@ -203,6 +255,21 @@ EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_USER = config("EMAIL_USER", "")
 
+# direct uploads (users.uploads), LocalUploadBackend keeps files
+# under LOCAL_UPLOAD_ROOT instead of sending them to Cloudinary
+UPLOAD_BACKEND = config("UPLOAD_BACKEND", "users.uploads.CloudinaryUploadBackend")
+UPLOAD_TOKEN_MAX_AGE = config("UPLOAD_TOKEN_MAX_AGE", 15 * 60, cast=int)
+LOCAL_UPLOAD_ROOT = config("LOCAL_UPLOAD_ROOT", str(BASE_DIR / "uploads"))
+LOCAL_UPLOAD_URL = "/uploads/"
+
+# resumable chunked uploads (users.chunked), assembled under CHUNKED_UPLOAD_ROOT
+# which every web worker must share
+CHUNKED_UPLOAD_ROOT = config("CHUNKED_UPLOAD_ROOT", str(BASE_DIR / "chunked_uploads"))
+UPLOAD_CHUNK_SIZE = config("UPLOAD_CHUNK_SIZE", 5 * 1024 * 1024, cast=int)
+CHUNKED_UPLOAD_MAX_SIZE = config("CHUNKED_UPLOAD_MAX_SIZE", 500 * 1024 * 1024, cast=int)
+CHUNKED_UPLOAD_EXPIRY = config("CHUNKED_UPLOAD_EXPIRY", 24 * 60 * 60, cast=int)
+CHUNKED_UPLOADS_PER_USER = config("CHUNKED_UPLOADS_PER_USER", 3, cast=int)
+
 cloudinary.config(
     cloud_name=config("CLOUDINARY_NAME"),
     api_key=config("CLOUDINARY_API_KEY"),
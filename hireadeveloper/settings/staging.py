@@ -7,3 +7,20 @@ ALLOWED_HOSTS = config(
 )
 
 DEBUG = True
+
+# The feed and authenticated-user caches are invalidated per key, which only
+# reaches every worker through a shared cache. Set CACHE_LOCATION to a Redis
+# URL (e.g. redis://127.0.0.1:6379/0) when running more than one worker.
+# Without it each process keeps its own local-memory cache (see base), and
+# token revocations and feed changes reach the other workers only as their
+# entries time out (users.cache.USER_CACHE_TIMEOUT, projects.cache.FEED_TIMEOUT).
+CACHE_LOCATION = config("CACHE_LOCATION", "")
+if CACHE_LOCATION:
+    CACHES = {
+        "default": {
+            "BACKEND": config(
+                "CACHE_BACKEND", "django.core.cache.backends.redis.RedisCache"
+            ),
+            "LOCATION": CACHE_LOCATION,
+        }
+    }
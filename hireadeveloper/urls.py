@@ -15,6 +15,8 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
@@ -23,3 +25,8 @@ urlpatterns = [
     path("v1/users/", include("users.urls")),
     path("v1/hire/", include("projects.urls")),
 ]
+
+# files kept by users.uploads.LocalUploadBackend, served only with DEBUG on
+urlpatterns += static(
+    settings.LOCAL_UPLOAD_URL, document_root=settings.LOCAL_UPLOAD_ROOT
+)
@@ -0,0 +1,106 @@
+"""
+Async variants of the project feed and project detail,
+see users/async_views.py
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from projects.cache import FEED_TIMEOUT, feed_cache_key
+from projects.filters import FEED_ORDERING_FIELDS, ProjectFilter
+from projects.models import Project
+from projects.serializers import ProjectSerializer, expand_param, split_param
+from users.async_views import (
+    aget_or_none,
+    apage,
+    async_login_required,
+    not_found,
+)
+
+
+def expand_projects(queryset, expand: set):
+    if "bids" in expand:
+        queryset = queryset.with_bids(developers="bids.developer" in expand)
+    return queryset.select_related("client")
+
+
+def order_projects(queryset, param):
+    """
+    ?ordering= as DRF's OrderingFilter applies it, unknown fields are ignored
+    """
+    ordering = [
+        term
+        for term in (term.strip() for term in (param or "").split(","))
+        if term.lstrip("-") in FEED_ORDERING_FIELDS
+    ]
+    return queryset.order_by(*ordering) if ordering else queryset
+
+
+@require_GET
+@async_login_required
+async def project_list(request):
+    """
+    Same filters, ordering, facets and feed cache as ProjectListView.
+    Only page number pagination, ?pagination=cursor is rejected.
+    """
+    if request.GET.get("pagination") == "cursor":
+        return JsonResponse(
+            {"detail": "Cursor pagination is not supported on the async feed."},
+            status=400,
+        )
+    key = await sync_to_async(feed_cache_key)(request)
+    data = await cache.aget(key)
+    if data is not None:
+        return JsonResponse(data)
+
+    expand = expand_param(request.GET.get("expand"))
+    fields = split_param(request.GET.get("fields")) or None
+    queryset = expand_projects(
+        Project.objects.filter(project_status="Available"), expand
+    )
+    terms = request.GET.get("q", "").strip()
+    if terms:
+        queryset = queryset.search(terms)
+    else:
+        queryset = queryset.order_by("-created_at")
+    filterset = ProjectFilter(request.GET, queryset=queryset)
+    if not filterset.is_valid():
+        return JsonResponse(filterset.errors, status=400)
+    queryset = order_projects(filterset.qs, request.GET.get("ordering"))
+
+    data = await apage(
+        request,
+        queryset,
+        lambda projects: ProjectSerializer(
+            projects,
+            many=True,
+            fields=fields,
+            expand=expand,
+            context={"request": request},
+        ).data,
+    )
+    if data is None:
+        return JsonResponse({"detail": "Invalid page."}, status=404)
+    if request.GET.get("facets") in ("1", "true"):
+        data["facets"] = await sync_to_async(queryset.facet_counts)()
+    await cache.aset(key, data, FEED_TIMEOUT)
+    return JsonResponse(data)
+
+
+@require_GET
+@async_login_required
+async def project_detail(request, slug):
+    expand = expand_param(request.GET.get("expand", "bids.developer"))
+    fields = split_param(request.GET.get("fields")) or None
+    queryset = expand_projects(
+        Project.objects.filter(project_status="Available"), expand
+    )
+    project = await aget_or_none(queryset, slug=slug)
+    if project is None:
+        return not_found()
+    serializer = ProjectSerializer(
+        project, fields=fields, expand=expand, context={"request": request}
+    )
+    return JsonResponse(serializer.data)
@@ -0,0 +1,82 @@
+"""
+Response cache for the public project feed
+
+Cached pages are keyed by a feed version, so bumping the version
+invalidates every cached page at once. Saving or deleting a project
+bumps it when the project is or was Available.
+
+Every feed row shows its bid counters, so pages are also keyed by a
+bids version, which bid saves and deletes bump.
+"""
+
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.utils.http import urlencode
+
+FEED_VERSION_KEY = "projects:feed:version"
+BIDS_VERSION_KEY = "projects:feed:bids-version"
+FEED_TIMEOUT = 60
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 0.05
+LOCK_RETRIES = 40
+
+
+def feed_version(key: str = FEED_VERSION_KEY) -> int:
+    version = cache.get(key)
+    if version is None:
+        # start from the clock so an evicted version never reuses old keys
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_feed(key: str = FEED_VERSION_KEY) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_feed_bids() -> None:
+    invalidate_feed(BIDS_VERSION_KEY)
+
+
+def feed_cache_key(request) -> str:
+    """
+    One entry per host, path and query (page, cursor, q, fields, expand...)
+    """
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    url = f"{request.get_host()}{request.path}?{query}"
+    digest = hashlib.md5(url.encode()).hexdigest()
+    version = f"{feed_version()}.{feed_version(BIDS_VERSION_KEY)}"
+    return f"projects:feed:{version}:{digest}"
+
+
+def get_or_set_locked(key: str, compute, timeout: int = FEED_TIMEOUT):
+    """
+    Return the cached value for key, computing it at most once at a time.
+    Concurrent misses wait for the lock holder instead of all hitting
+    the database, and fall back to computing if it takes too long.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f"{key}:lock"
+    for _ in range(LOCK_RETRIES):
+        if cache.add(lock_key, 1, LOCK_TIMEOUT):
+            try:
+                value = compute()
+                cache.set(key, value, timeout)
+                return value
+            finally:
+                cache.delete(lock_key)
+
+        time.sleep(LOCK_WAIT)
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    return compute()
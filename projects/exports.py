@@ -0,0 +1,47 @@
+from projects.models import Bid, Project
+from hireadeveloper.exports import apply_export_filters
+
+PROJECT_COLUMNS = (
+    ("id", "id"),
+    ("name", "name"),
+    ("description", "description"),
+    ("project_category", "project_category"),
+    ("project_type", "project_type"),
+    ("project_duration", "project_duration"),
+    ("project_status", "project_status"),
+    ("project_progress", "project_progress"),
+    ("min_price", "min_price"),
+    ("max_price", "max_price"),
+    ("client", "client__username"),
+    ("slug", "slug"),
+    ("bid_count", "bid_count"),
+    ("created_at", "created_at"),
+)
+
+BID_COLUMNS = (
+    ("id", "id"),
+    ("project", "project__slug"),
+    ("developer", "developer__username"),
+    ("proposal", "proposal"),
+    ("status", "status"),
+    ("slug", "slug"),
+    ("created_at", "created_at"),
+)
+
+
+def project_export_queryset(params):
+    return apply_export_filters(
+        Project.objects.all(),
+        params,
+        status_field="project_status",
+        category_field="project_category",
+    )
+
+
+def bid_export_queryset(params):
+    return apply_export_filters(
+        Bid.objects.all(),
+        params,
+        status_field="status",
+        category_field="project__project_category",
+    )
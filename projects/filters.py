@@ -0,0 +1,47 @@
+"""
+FilterSets only expose columns backed by an index (see the model Meta indexes)
+"""
+
+from django_filters import rest_framework as filters
+
+from projects.models import Bid, Project
+
+
+class ProjectFilter(filters.FilterSet):
+    project_category = filters.ChoiceFilter(choices=Project.PROJECT_CATEGORY)
+    project_type = filters.ChoiceFilter(choices=Project.PROJECT_TYPE)
+    project_status = filters.ChoiceFilter(choices=Project.PROJECT_STATUS)
+    # projects whose min_price - max_price range overlaps [price_min, price_max]
+    price_min = filters.NumberFilter(field_name="max_price", lookup_expr="gte")
+    price_max = filters.NumberFilter(field_name="min_price", lookup_expr="lte")
+    created_after = filters.IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="gte"
+    )
+    created_before = filters.IsoDateTimeFilter(
+        field_name="created_at", lookup_expr="lte"
+    )
+
+    class Meta:
+        model = Project
+        fields = (
+            "project_category",
+            "project_type",
+            "project_status",
+            "price_min",
+            "price_max",
+            "created_after",
+            "created_before",
+        )
+
+
+# only orderings with a matching index on the Available feed
+FEED_ORDERING_FIELDS = ["created_at", "bid_count"]
+
+
+class BidFilter(filters.FilterSet):
+    status = filters.ChoiceFilter(choices=Bid.BID_STATUS)
+    project = filters.CharFilter(field_name="project__slug")
+
+    class Meta:
+        model = Bid
+        fields = ("status", "project")
@@ -0,0 +1,112 @@
+"""
+Bulk project import
+
+Rows are validated with ProjectSerializer and inserted with bulk_create
+in batches. bulk_create skips the model signals, so slugs, search vectors
+and the feed cache are handled here instead.
+"""
+
+import codecs
+import csv
+import json
+
+from django.db import connection, transaction
+from rest_framework.exceptions import ValidationError
+
+from projects.cache import invalidate_feed
+from projects.models import PROJECT_SEARCH_VECTOR, Project, project_slug
+from projects.serializers import ProjectSerializer
+
+BATCH_SIZE = 500
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+CONTENT_TYPES = (JSON, NDJSON, CSV)
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def iter_rows(request):
+    """
+    Yield (row number, row dict) pairs from the request body.
+    NDJSON and CSV bodies are read line by line from the request stream.
+    """
+    content_type = request.content_type.split(";")[0].strip()
+    if content_type == JSON:
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ImportFormatError("Expected a JSON array of projects.")
+        yield from enumerate(rows, start=1)
+        return
+
+    if content_type not in (NDJSON, CSV):
+        raise ImportFormatError(
+            f"Unsupported content type, use one of: {', '.join(CONTENT_TYPES)}."
+        )
+    if request.stream is None:
+        return
+
+    lines = codecs.iterdecode(request.stream, "utf-8")
+    if content_type == CSV:
+        yield from enumerate(csv.DictReader(lines), start=1)
+        return
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError:
+            yield number, None
+
+
+def create_batch(projects: list) -> None:
+    with transaction.atomic():
+        Project.objects.bulk_create(projects)
+        if connection.vendor == "postgresql":
+            Project.objects.filter(pk__in=[project.pk for project in projects]).update(
+                search_vector=PROJECT_SEARCH_VECTOR
+            )
+
+
+def import_projects(rows, client, context: dict) -> dict:
+    """
+    Validate and insert rows as projects owned by client.
+    Returns the number created and the errors for each rejected row.
+    """
+    created = 0
+    errors = []
+    batch = []
+    # one serializer, its fields are built once and reused for every row
+    serializer = ProjectSerializer(context=context)
+
+    for number, row in rows:
+        if not isinstance(row, dict):
+            errors.append({"row": number, "errors": ["Invalid row."]})
+            continue
+        # files can't be sent in a bulk import
+        row = {key: value for key, value in row.items() if key != "file"}
+        try:
+            validated_data = serializer.run_validation(row)
+        except ValidationError as e:
+            errors.append({"row": number, "errors": e.detail})
+            continue
+
+        project = Project(client=client, **validated_data)
+        project.slug = project_slug(project)
+        batch.append(project)
+        if len(batch) >= BATCH_SIZE:
+            create_batch(batch)
+            created += len(batch)
+            batch = []
+
+    if batch:
+        create_batch(batch)
+        created += len(batch)
+    if created:
+        invalidate_feed()
+
+    return {"created": created, "errors": errors}
@@ -0,0 +1,53 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent GET throughput against a running server. "
+        "Compare WSGI (gunicorn hireadeveloper.wsgi) on /v1/hire/all-projects/ "
+        "with ASGI (uvicorn hireadeveloper.asgi:application) "
+        "on /v1/hire/async/all-projects/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url")
+        parser.add_argument("--token", help="JWT access token")
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=500)
+
+    def handle(self, *args, **options):
+        headers = {}
+        if options["token"]:
+            headers["Authorization"] = f"Bearer {options['token']}"
+
+        def fetch(_):
+            request = urllib.request.Request(options["url"], headers=headers)
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (urllib.error.URLError, ConnectionError):
+                ok = False
+            return ok, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = list(pool.map(fetch, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency in results)
+        failures = sum(1 for ok, _ in results if not ok)
+        self.stdout.write(
+            f"{options['requests']} requests, concurrency {options['concurrency']}: "
+            f"{options['requests'] / elapsed:.1f} req/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms, "
+            f"{failures} failed"
+        )
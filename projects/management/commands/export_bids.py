@@ -0,0 +1,8 @@
+from projects.exports import BID_COLUMNS, bid_export_queryset
+from hireadeveloper.exports import ExportCommand
+
+
+class Command(ExportCommand):
+    help = "Export bids as NDJSON or CSV"
+    columns = BID_COLUMNS
+    queryset_factory = bid_export_queryset
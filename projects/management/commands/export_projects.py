@@ -0,0 +1,8 @@
+from projects.exports import PROJECT_COLUMNS, project_export_queryset
+from hireadeveloper.exports import ExportCommand
+
+
+class Command(ExportCommand):
+    help = "Export projects as NDJSON or CSV"
+    columns = PROJECT_COLUMNS
+    queryset_factory = project_export_queryset
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = "Recompute every project's denormalized bid counters from the bids table"
+
+    def handle(self, *args, **options):
+        updated = Project.objects.rebuild_bid_counters()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt bid counters for {updated} projects")
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from projects.recommendations import (
+    TOP_K,
+    last_refreshed,
+    rebuild_recommendations,
+    refresh_recommendations,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Update precomputed project recommendations for projects and profiles "
+        "changed since the last run, or rebuild them all with --full"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true")
+        parser.add_argument("--top-k", type=int, default=TOP_K)
+
+    def handle(self, *args, **options):
+        since = None if options["full"] else last_refreshed()
+        if since is None:
+            saved = rebuild_recommendations(options["top_k"])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {saved} recommendations"))
+        else:
+            saved = refresh_recommendations(since, options["top_k"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Refreshed {saved} recommendations since {since}")
+            )
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:25
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+class AddPostgresIndex(migrations.AddIndex):
+    """
+    GIN indexes only exist on PostgreSQL; other backends (sqlite in tests)
+    keep the index in model state but skip the DDL.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def populate_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Project = apps.get_model("projects", "Project")
+    Project.objects.update(
+        search_vector=SearchVector("name", weight="A")
+        + SearchVector("description", weight="B")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0011_alter_bid_options"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        AddPostgresIndex(
+            model_name="project",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="project_search_vector_gin"
+            ),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_bids(apps, schema_editor):
+    """
+    Bid.clean never ran through the API, so duplicates may exist.
+    Keep each developer's accepted bid per project, or else the earliest,
+    before adding the constraint.
+    """
+    Bid = apps.get_model("projects", "Bid")
+    seen = set()
+    duplicates = []
+    accepted_first = models.Case(models.When(status="Accepted", then=0), default=1)
+    for bid_id, project_id, developer_id in (
+        Bid.objects.order_by(accepted_first, "created_at")
+        .values_list("id", "project_id", "developer_id")
+        .iterator()
+    ):
+        key = (project_id, developer_id)
+        if key in seen:
+            duplicates.append(bid_id)
+        else:
+            seen.add(key)
+    Bid.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0012_project_search_vector"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(
+                fields=["developer", "-created_at"], name="bid_developer_recent_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(("project_status", "Available")),
+                fields=["-created_at"],
+                name="project_available_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                fields=["client", "-created_at"], name="project_client_recent_idx"
+            ),
+        ),
+        migrations.RunPython(remove_duplicate_bids, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="bid",
+            constraint=models.UniqueConstraint(
+                fields=("project", "developer"),
+                name="unique_bid_per_developer",
+                violation_error_message="You have already placed a bid on this project.",
+            ),
+        ),
+    ]
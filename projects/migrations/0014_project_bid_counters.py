@@ -0,0 +1,61 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:30
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_bid_counters(apps, schema_editor):
+    Project = apps.get_model("projects", "Project")
+    Bid = apps.get_model("projects", "Bid")
+    counters = {
+        "bid_count": {},
+        "pending_bid_count": {"status": "Pending"},
+        "accepted_bid_count": {"status": "Accepted"},
+        "rejected_bid_count": {"status": "Rejected"},
+    }
+    Project.objects.update(
+        **{
+            field: Coalesce(
+                models.Subquery(
+                    Bid.objects.filter(project=models.OuterRef("pk"), **filters)
+                    .order_by()
+                    .values("project")
+                    .annotate(total=models.Count("pk"))
+                    .values("total")
+                ),
+                0,
+            )
+            for field, filters in counters.items()
+        }
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0013_project_bid_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="accepted_bid_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="bid_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="pending_bid_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="rejected_bid_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_bid_counters, migrations.RunPython.noop),
+    ]
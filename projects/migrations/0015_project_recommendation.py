@@ -0,0 +1,62 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0014_project_bid_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectRecommendation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "developer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recommendations",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recommendations",
+                        to="projects.project",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-score"],
+                "indexes": [
+                    models.Index(
+                        fields=["developer", "-score"], name="recommendation_score_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="projectrecommendation",
+            constraint=models.UniqueConstraint(
+                fields=("developer", "project"), name="unique_recommendation"
+            ),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0015_project_recommendation"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bid",
+            index=models.Index(
+                fields=["developer", "status", "-created_at"],
+                name="bid_developer_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(("project_status", "Available")),
+                fields=["project_category", "-created_at"],
+                name="project_available_category_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(("project_status", "Available")),
+                fields=["project_type", "-created_at"],
+                name="project_available_type_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(("project_status", "Available")),
+                fields=["max_price", "min_price"],
+                name="project_available_price_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(("project_status", "Available")),
+                fields=["-bid_count", "-created_at"],
+                name="project_available_bids_idx",
+            ),
+        ),
+    ]
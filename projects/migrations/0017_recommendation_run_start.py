@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0016_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="projectrecommendation",
+            name="updated_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,18 +1,140 @@
 from decimal import Decimal
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    SearchVectorField,
+)
 from django.core.exceptions import ValidationError
 from cloudinary.models import CloudinaryField
-from django.db.models.signals import pre_save
+from django.db import connection
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.text import slugify
 
-from users.abstracts import TimeStampedModel, UniversalIdModel
+from projects.cache import invalidate_feed, invalidate_feed_bids
+from users.abstracts import StoredFilesMixin, TimeStampedModel, UniversalIdModel
+from users.models import release_file_references, update_file_references
 
 User = get_user_model()
 
 
-class Project(UniversalIdModel, TimeStampedModel):
+# (label, low, high) price buckets for feed facets, high is exclusive
+PRICE_BUCKETS = (
+    ("0-100", 0, 100),
+    ("100-500", 100, 500),
+    ("500-1000", 500, 1000),
+    ("1000-5000", 1000, 5000),
+    ("5000+", 5000, None),
+)
+
+
+class ProjectQuerySet(models.QuerySet):
+    def with_bids(self, developers: bool = True):
+        """
+        Load the bids (and optionally their developers) up front so that
+        serializing a page of projects costs a fixed number of queries
+        """
+        bids = Bid.objects.all()
+        if developers:
+            bids = bids.select_related("developer")
+        return self.prefetch_related(models.Prefetch("bids", queryset=bids))
+
+    def facet_counts(self) -> dict:
+        """
+        Counts per category, type, progress and price bucket,
+        computed with a single conditional aggregation query.
+        A project falls in every price bucket its min-max range overlaps.
+        """
+        facets = {
+            "project_category": Project.PROJECT_CATEGORY,
+            "project_type": Project.PROJECT_TYPE,
+            "project_progress": Project.PROJECT_PROGRESS,
+        }
+        aggregates = {}
+        for field, choices in facets.items():
+            for i, (value, _) in enumerate(choices):
+                aggregates[f"{field}_{i}"] = models.Count(
+                    "pk", filter=models.Q(**{field: value})
+                )
+        for i, (_, low, high) in enumerate(PRICE_BUCKETS):
+            overlaps = models.Q(max_price__gte=low)
+            if high is not None:
+                overlaps &= models.Q(min_price__lt=high)
+            aggregates[f"price_{i}"] = models.Count("pk", filter=overlaps)
+
+        counts = self.order_by().aggregate(**aggregates)
+        result = {
+            field: {
+                value: counts[f"{field}_{i}"] for i, (value, _) in enumerate(choices)
+            }
+            for field, choices in facets.items()
+        }
+        result["price"] = {
+            label: counts[f"price_{i}"] for i, (label, _, _) in enumerate(PRICE_BUCKETS)
+        }
+        return result
+
+    def rebuild_bid_counters(self) -> int:
+        """
+        Recompute the denormalized bid counters from the bids table
+        in a single UPDATE, returns the number of projects updated
+        """
+        counters = {"bid_count": Bid.objects.filter(project=models.OuterRef("pk"))}
+        for status, field in Bid.STATUS_COUNTERS.items():
+            counters[field] = Bid.objects.filter(
+                project=models.OuterRef("pk"), status=status
+            )
+        return self.update(
+            **{
+                field: Coalesce(
+                    models.Subquery(
+                        bids.order_by()
+                        .values("project")
+                        .annotate(total=models.Count("pk"))
+                        .values("total")
+                    ),
+                    0,
+                )
+                for field, bids in counters.items()
+            }
+        )
+
+    def search(self, terms: str):
+        """
+        Ranked full-text search on name and description.
+        PostgreSQL uses the indexed search_vector; other databases
+        (sqlite in tests) fall back to icontains, ranking name matches first.
+        """
+        if connection.vendor == "postgresql":
+            query = SearchQuery(terms, search_type="websearch")
+            return (
+                self.filter(search_vector=query)
+                .annotate(rank=SearchRank(models.F("search_vector"), query))
+                .order_by("-rank", "-created_at")
+            )
+
+        return (
+            self.filter(
+                models.Q(name__icontains=terms) | models.Q(description__icontains=terms)
+            )
+            .annotate(
+                rank=models.Case(
+                    models.When(name__icontains=terms, then=models.Value(1.0)),
+                    default=models.Value(0.5),
+                    output_field=models.FloatField(),
+                )
+            )
+            .order_by("-rank", "-created_at")
+        )
+
+
+class Project(StoredFilesMixin, UniversalIdModel, TimeStampedModel):
     """
     clients create projects
     """
@@ -62,6 +184,51 @@ class Project(UniversalIdModel, TimeStampedModel):
         max_digits=10, decimal_places=2, null=True, blank=True
     )
     slug = models.SlugField(max_length=400, unique=True, blank=True, null=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # denormalized from bids, maintained by the Bid signals below
+    bid_count = models.PositiveIntegerField(default=0, editable=False)
+    pending_bid_count = models.PositiveIntegerField(default=0, editable=False)
+    accepted_bid_count = models.PositiveIntegerField(default=0, editable=False)
+    rejected_bid_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ProjectQuerySet.as_manager()
+    file_fields = ("file",)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="project_search_vector_gin"),
+            # public feed: Available projects, newest first
+            models.Index(
+                fields=["-created_at"],
+                name="project_available_recent_idx",
+                condition=models.Q(project_status="Available"),
+            ),
+            # a client's own projects, newest first
+            models.Index(
+                fields=["client", "-created_at"], name="project_client_recent_idx"
+            ),
+            # feed filters (projects.filters.ProjectFilter) and ?ordering=bid_count
+            models.Index(
+                fields=["project_category", "-created_at"],
+                name="project_available_category_idx",
+                condition=models.Q(project_status="Available"),
+            ),
+            models.Index(
+                fields=["project_type", "-created_at"],
+                name="project_available_type_idx",
+                condition=models.Q(project_status="Available"),
+            ),
+            models.Index(
+                fields=["max_price", "min_price"],
+                name="project_available_price_idx",
+                condition=models.Q(project_status="Available"),
+            ),
+            models.Index(
+                fields=["-bid_count", "-created_at"],
+                name="project_available_bids_idx",
+                condition=models.Q(project_status="Available"),
+            ),
+        ]
 
     @property
     def price_range(self):
@@ -78,17 +245,79 @@ class Project(UniversalIdModel, TimeStampedModel):
         else:
             raise ValueError("Invalid price range format. Use 'min - max'.")
 
+    # maintained by F() updates from the Bid signals,
+    # so never written back from a possibly stale instance
+    COUNTER_FIELDS = (
+        "bid_count",
+        "pending_bid_count",
+        "accepted_bid_count",
+        "rejected_bid_count",
+    )
+    # likewise maintained by search_vector_post_save
+    DERIVED_FIELDS = COUNTER_FIELDS + ("search_vector",)
+
+    # name and description as loaded, see search_vector_post_save
+    _stored_search_text = None
+    # project_status as loaded, see project_feed_invalidate
+    _stored_status = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {"name", "description"} <= set(field_names):
+            instance._stored_search_text = (instance.name, instance.description)
+        if "project_status" in field_names:
+            instance._stored_status = instance.project_status
+        return instance
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return self.name
 
 
+def project_slug(project) -> str:
+    return slugify(f"{project.id}-{project.name}")
+
+
 @receiver(pre_save, sender=Project)
 def slug_pre_save(sender, instance, **kwargs) -> None:
     if instance.slug is None or instance.slug == "":
-        instance.slug = slugify(f"{instance.id}-{instance.name}")
+        instance.slug = project_slug(instance)
+
+
+PROJECT_SEARCH_VECTOR = SearchVector("name", weight="A") + SearchVector(
+    "description", weight="B"
+)
+
+
+@receiver(post_save, sender=Project)
+def search_vector_post_save(
+    sender, instance, created=False, update_fields=None, **kwargs
+) -> None:
+    """
+    Keep the project's search vector current on PostgreSQL,
+    only updating it when the name or description was written and changed
+    """
+    text = (instance.name, instance.description)
+    written = update_fields is None or {"name", "description"} & set(update_fields)
+    if not created and (not written or instance._stored_search_text == text):
+        return
+    instance._stored_search_text = text
+    if connection.vendor == "postgresql":
+        Project.objects.filter(pk=instance.pk).update(
+            search_vector=PROJECT_SEARCH_VECTOR
+        )
 
 
-class Bid(UniversalIdModel, TimeStampedModel):
+class Bid(StoredFilesMixin, UniversalIdModel, TimeStampedModel):
     """
     The model for developers to place bids on projects posted by clients
     """
@@ -107,23 +336,56 @@ class Bid(UniversalIdModel, TimeStampedModel):
     status = models.CharField(max_length=100, choices=BID_STATUS, default="Pending")
     slug = models.SlugField(max_length=400, unique=True, blank=True, null=True)
 
+    file_fields = ("file",)
+
+    # Project counter field for each bid status
+    STATUS_COUNTERS = {
+        "Pending": "pending_bid_count",
+        "Accepted": "accepted_bid_count",
+        "Rejected": "rejected_bid_count",
+    }
+
     class Meta:
         ordering = ["project"]
+        constraints = [
+            # a developer can only place one bid per project;
+            # also serves bids-per-project lookups ordered by project
+            models.UniqueConstraint(
+                fields=["project", "developer"],
+                name="unique_bid_per_developer",
+                violation_error_message="You have already placed a bid on this project.",
+            ),
+        ]
+        indexes = [
+            # a developer's bids, newest first
+            models.Index(
+                fields=["developer", "-created_at"], name="bid_developer_recent_idx"
+            ),
+            # a developer's bids filtered by ?status=
+            models.Index(
+                fields=["developer", "status", "-created_at"],
+                name="bid_developer_status_idx",
+            ),
+        ]
+
+    # the status as stored, so saves can tell which counters to move
+    _stored_status = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "status" in field_names:
+            instance._stored_status = instance.status
+        return instance
 
     def clean(self):
         super().clean()
 
         # Ensure that the developer is not bidding on their own project
-        if self.developer == self.project.client:
+        # (duplicate bids are rejected by the unique_bid_per_developer constraint)
+        if self.developer_id == self.project.client_id:
             raise ValidationError("You cannot bid on your own project.")
 
-        # Ensure that the developer has not already placed a bid on this project
-        existing_bids = Bid.objects.filter(
-            project=self.project, developer=self.developer
-        )
-        if existing_bids.exists():
-            raise ValidationError("You have already placed a bid on this project.")
-
     def __str__(self) -> str:
         return self.project.name
 
@@ -134,3 +396,107 @@ def slug_pre_save(sender, instance, **kwargs) -> None:
         instance.slug = slugify(
             f"{instance.id}-{instance.developer.username}-{instance.project.name}"
         )
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=Bid)
+def file_references_post_save(sender, instance, created, **kwargs) -> None:
+    update_file_references(instance, created)
+
+
+@receiver(pre_delete, sender=Project)
+@receiver(pre_delete, sender=Bid)
+def file_references_pre_delete(sender, instance, **kwargs) -> None:
+    instance.load_stored_files()
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Bid)
+def file_references_post_delete(sender, instance, **kwargs) -> None:
+    release_file_references(instance)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_feed_invalidate(sender, instance, **kwargs) -> None:
+    """
+    Only Available projects are in the feed,
+    so a change to any other project leaves it as is
+    """
+    if "Available" in (instance.project_status, instance._stored_status):
+        invalidate_feed()
+    instance._stored_status = instance.project_status
+
+
+@receiver(post_save, sender=Bid)
+@receiver(post_delete, sender=Bid)
+def bid_feed_invalidate(sender, **kwargs) -> None:
+    invalidate_feed_bids()
+
+
+class ProjectRecommendation(models.Model):
+    """
+    Precomputed top matching projects for each developer,
+    built by projects.recommendations
+    """
+
+    developer = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="recommendations"
+    )
+    project = models.ForeignKey(
+        Project, on_delete=models.CASCADE, related_name="recommendations"
+    )
+    score = models.FloatField()
+    # start of the run that computed the row, the incremental watermark
+    # (see projects.recommendations.last_refreshed)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-score"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["developer", "project"], name="unique_recommendation"
+            ),
+        ]
+        indexes = [
+            # a developer's recommendations, best first
+            models.Index(
+                fields=["developer", "-score"], name="recommendation_score_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.developer} - {self.project}"
+
+
+def adjust_bid_counters(project_id, changes: dict) -> None:
+    """
+    Atomically apply {status: delta} to a project's bid counters
+    """
+    updates = {
+        Bid.STATUS_COUNTERS[status]: models.F(Bid.STATUS_COUNTERS[status]) + delta
+        for status, delta in changes.items()
+        if delta and status in Bid.STATUS_COUNTERS
+    }
+    total = sum(changes.values())
+    if total:
+        updates["bid_count"] = models.F("bid_count") + total
+    if updates:
+        Project.objects.filter(pk=project_id).update(**updates)
+
+
+@receiver(post_save, sender=Bid)
+def bid_counters_post_save(sender, instance, created, **kwargs) -> None:
+    previous = instance._stored_status
+    if created:
+        adjust_bid_counters(instance.project_id, {instance.status: 1})
+    elif previous is not None and previous != instance.status:
+        adjust_bid_counters(instance.project_id, {previous: -1, instance.status: 1})
+    instance._stored_status = instance.status
+
+
+@receiver(post_delete, sender=Bid)
+def bid_counters_post_delete(sender, instance, **kwargs) -> None:
+    adjust_bid_counters(
+        instance.project_id, {instance._stored_status or instance.status: -1}
+    )
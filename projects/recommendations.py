@@ -0,0 +1,217 @@
+"""
+Project recommendations for developers
+
+Available projects (name, description, category) and developer profiles
+(skills, role) are turned into TF-IDF vectors held in SciPy sparse
+matrices. One sparse product gives the cosine similarity of every
+developer with every project; each developer's top K matches are stored
+in ProjectRecommendation so the API serves them with a single indexed query.
+"""
+
+import math
+import re
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from scipy import sparse
+
+from projects.models import Project, ProjectRecommendation
+from users.models import DeveloperProfile
+
+TOP_K = 20
+MIN_SCORE = 0.01
+# edits saved just before a run but committed after it read them
+WATERMARK_OVERLAP = timedelta(minutes=1)
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOP_WORDS = frozenset(
+    """
+    a an and are as at be by for from has have i in is it of on or our the
+    this to we will with you your
+    """.split()
+)
+
+
+def tokenize(text: str) -> list:
+    return [
+        token
+        for token in TOKEN_RE.findall((text or "").lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+class TfidfVectorizer:
+    """
+    Vocabulary and smoothed idf fitted on the project corpus,
+    transform() returns L2-normalized sublinear tf-idf rows
+    """
+
+    def __init__(self, documents: list):
+        document_frequency = Counter()
+        for document in documents:
+            document_frequency.update(set(tokenize(document)))
+        self.vocabulary = {term: i for i, term in enumerate(document_frequency)}
+        count = len(documents)
+        self.idf = np.array(
+            [
+                math.log((1 + count) / (1 + document_frequency[term])) + 1
+                for term in self.vocabulary
+            ]
+        )
+
+    def transform(self, documents: list) -> sparse.csr_matrix:
+        rows, columns, values = [], [], []
+        for row, document in enumerate(documents):
+            counts = Counter(
+                term for term in tokenize(document) if term in self.vocabulary
+            )
+            for term, tf in counts.items():
+                column = self.vocabulary[term]
+                rows.append(row)
+                columns.append(column)
+                values.append((1 + math.log(tf)) * self.idf[column])
+
+        matrix = sparse.csr_matrix(
+            (values, (rows, columns)), shape=(len(documents), len(self.vocabulary))
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ matrix
+
+
+def project_documents():
+    rows = Project.objects.filter(project_status="Available").values_list(
+        "id", "name", "description", "project_category"
+    )
+    ids, documents = [], []
+    for project_id, *text in rows.iterator():
+        ids.append(project_id)
+        documents.append(" ".join(part for part in text if part))
+    return ids, documents
+
+
+def developer_documents(developer_ids=None):
+    rows = DeveloperProfile.objects.values_list("developer_id", "skills", "role")
+    if developer_ids is not None:
+        rows = rows.filter(developer_id__in=developer_ids)
+    ids, documents = [], []
+    for developer_id, *text in rows.iterator():
+        ids.append(developer_id)
+        documents.append(" ".join(part for part in text if part))
+    return ids, documents
+
+
+def top_matches(similarity, developer_ids, project_ids, top_k: int):
+    """
+    Yield ProjectRecommendation rows for the top_k scores in each row
+    of the (developers x projects) similarity matrix
+    """
+    similarity = similarity.tocsr()
+    for row, developer_id in enumerate(developer_ids):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        scores = similarity.data[start:end]
+        columns = similarity.indices[start:end]
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k)[:top_k]
+            scores, columns = scores[best], columns[best]
+        for score, column in zip(scores, columns):
+            if score >= MIN_SCORE:
+                yield ProjectRecommendation(
+                    developer_id=developer_id,
+                    project_id=project_ids[column],
+                    score=float(score),
+                )
+
+
+def save_recommendations(
+    developer_ids, recommendations, started, everyone=False
+) -> int:
+    """
+    Replace the developers' recommendations, stamped with the run's start
+    """
+    recommendations = list(recommendations)
+    for recommendation in recommendations:
+        recommendation.updated_at = started
+    with transaction.atomic():
+        existing = ProjectRecommendation.objects.all()
+        if not everyone:
+            existing = existing.filter(developer_id__in=developer_ids)
+        existing.delete()
+        ProjectRecommendation.objects.bulk_create(recommendations, batch_size=1000)
+    return len(recommendations)
+
+
+def rebuild_recommendations(top_k: int = TOP_K) -> int:
+    """
+    Recompute every developer's recommendations
+    """
+    started = timezone.now()
+    project_ids, project_texts = project_documents()
+    developer_ids, developer_texts = developer_documents()
+    vectorizer = TfidfVectorizer(project_texts)
+    similarity = (
+        vectorizer.transform(developer_texts) @ vectorizer.transform(project_texts).T
+    )
+    return save_recommendations(
+        developer_ids,
+        top_matches(similarity, developer_ids, project_ids, top_k),
+        started,
+        everyone=True,
+    )
+
+
+def last_refreshed():
+    """
+    Where the next incremental run starts: the start of the last run,
+    less WATERMARK_OVERLAP. Edits made while that run was computing
+    are picked up again.
+    """
+    last = ProjectRecommendation.objects.aggregate(last=Max("updated_at"))["last"]
+    return None if last is None else last - WATERMARK_OVERLAP
+
+
+def refresh_recommendations(since, top_k: int = TOP_K) -> int:
+    """
+    Incremental update for projects and profiles changed since `since`.
+    Only developers whose results can change are recomputed: those whose
+    profile changed, those already recommended a changed project, and
+    those matching a changed project. The vocabulary is refitted each
+    run, idf drift for untouched developers is fixed by a full rebuild.
+    """
+    started = timezone.now()
+    changed_projects = set(
+        Project.objects.filter(updated_at__gte=since).values_list("id", flat=True)
+    )
+    affected = set(
+        DeveloperProfile.objects.filter(updated_at__gte=since).values_list(
+            "developer_id", flat=True
+        )
+    )
+    affected.update(
+        ProjectRecommendation.objects.filter(
+            project_id__in=changed_projects
+        ).values_list("developer_id", flat=True)
+    )
+
+    project_ids, project_texts = project_documents()
+    vectorizer = TfidfVectorizer(project_texts)
+    projects = vectorizer.transform(project_texts)
+
+    changed_rows = [i for i, pk in enumerate(project_ids) if pk in changed_projects]
+    if changed_rows:
+        developer_ids, developer_texts = developer_documents()
+        hits = vectorizer.transform(developer_texts) @ projects[changed_rows].T
+        matched = np.flatnonzero(np.asarray(hits.max(axis=1).todense()).ravel())
+        affected.update(developer_ids[row] for row in matched)
+
+    if not affected:
+        return 0
+    developer_ids, developer_texts = developer_documents(affected)
+    similarity = vectorizer.transform(developer_texts) @ projects.T
+    # developers without a profile any more still get their rows cleared
+    return save_recommendations(
+        affected, top_matches(similarity, developer_ids, project_ids, top_k), started
+    )
@@ -1,24 +1,80 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
 from projects.models import Project, Bid
 from users.serializers import DeveloperSerializer
+from users.uploads import StoreUploadsMixin, UploadField
 
 User = get_user_model()
 
 
-class BidSerializer(serializers.ModelSerializer):
+def split_param(value) -> set:
+    """
+    "a, b,c" -> {"a", "b", "c"}
+    """
+    if not value:
+        return set()
+    return {part.strip() for part in value.split(",") if part.strip()}
+
+
+def expand_param(value) -> set:
+    """
+    Like split_param, but expanding "bids.developer" also expands "bids"
+    """
+    expand = set()
+    for path in split_param(value):
+        parts = path.split(".")
+        expand.update(".".join(parts[: i + 1]) for i in range(len(parts)))
+    return expand
+
+
+class SparseFieldsMixin:
+    """
+    Output shaping for ?fields= and ?expand=
+    - fields: only these top-level fields are returned
+    - expand: nested relations in expandable_fields are only returned when asked for
+    Only the representation is affected, writes still validate every field.
+    """
+
+    expandable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        self.requested_fields = kwargs.pop("fields", None)
+        self.expand = set(kwargs.pop("expand", ()))
+        super().__init__(*args, **kwargs)
+
+    def is_expanded(self, name: str) -> bool:
+        return name in self.expand
+
+    def nested_expand(self, name: str) -> set:
+        prefix = f"{name}."
+        return {path[len(prefix) :] for path in self.expand if path.startswith(prefix)}
+
+    @property
+    def _readable_fields(self):
+        for field in super()._readable_fields:
+            name = field.field_name
+            if self.requested_fields and name not in self.requested_fields:
+                continue
+            if name in self.expandable_fields and not self.is_expanded(name):
+                continue
+            yield field
+
+
+class BidSerializer(StoreUploadsMixin, SparseFieldsMixin, serializers.ModelSerializer):
     """
     Bid serializers
+    developer is returned as an id unless expanded
     """
 
     project = serializers.SlugRelatedField(
         queryset=Project.objects.all(), slug_field="slug"
     )
     proposal = serializers.CharField(min_length=1)
-    developer = DeveloperSerializer(read_only=True)
+    developer = serializers.SerializerMethodField(read_only=True)
     slug = serializers.SlugField(read_only=True)
-    file = serializers.FileField(required=False, use_url=True)
+    file = UploadField("bid_file", required=False)
 
     class Meta:
         model = Bid
@@ -32,16 +88,41 @@ class BidSerializer(serializers.ModelSerializer):
             "status",
         )
 
+    def get_developer(self, obj):
+        if self.is_expanded("developer"):
+            return DeveloperSerializer(obj.developer).data
+        return str(obj.developer_id)
+
     def create(self, validated_data):
         validated_data["developer"] = self.context["request"].user
-        return Bid.objects.create(**validated_data)
+        try:
+            with transaction.atomic():
+                return Bid.objects.create(**validated_data)
+        except IntegrityError:
+            # only unique_bid_per_developer is a client error, sqlite does not
+            # name the constraint so look for the existing bid instead
+            duplicate = Bid.objects.filter(
+                project=validated_data["project"],
+                developer=validated_data["developer"],
+            ).exists()
+            if not duplicate:
+                raise
+            raise serializers.ValidationError(
+                "You have already placed a bid on this project.",
+                code="duplicate_bid",
+            )
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(
+    StoreUploadsMixin, SparseFieldsMixin, serializers.ModelSerializer
+):
     """
     Projects serializers
+    bids are only returned when expanded
     """
 
+    expandable_fields = ("bids",)
+
     name = serializers.CharField(min_length=1)
     description = serializers.CharField(min_length=1)
     project_category = serializers.CharField(min_length=2)
@@ -49,7 +130,7 @@ class ProjectSerializer(serializers.ModelSerializer):
     project_duration = serializers.CharField(min_length=2)
     project_progress = serializers.CharField(min_length=1)
     project_status = serializers.CharField(min_length=1)
-    file = serializers.FileField(required=False, use_url=True)
+    file = UploadField("project_file", required=False)
     min_price = serializers.IntegerField()
     max_price = serializers.IntegerField()
     client = serializers.CharField(read_only=True, source="client.username")
@@ -72,6 +153,10 @@ class ProjectSerializer(serializers.ModelSerializer):
             "max_price",
             "client",
             "slug",
+            "bid_count",
+            "pending_bid_count",
+            "accepted_bid_count",
+            "rejected_bid_count",
             "bids",
         )
 
@@ -80,6 +165,18 @@ class ProjectSerializer(serializers.ModelSerializer):
         return Project.objects.create(**validated_data)
 
     def get_bids(self, obj):
-        bids = Bid.objects.filter(project=obj)
-        serializer = BidSerializer(bids, many=True)
+        # reuses the prefetched bids when the view loaded them with_bids()
+        bids = obj.bids.all()
+        serializer = BidSerializer(bids, many=True, expand=self.nested_expand("bids"))
         return serializer.data
+
+
+class RecommendedProjectSerializer(ProjectSerializer):
+    """
+    Projects recommended to a developer, with the match score
+    """
+
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(ProjectSerializer.Meta):
+        fields = ProjectSerializer.Meta.fields + ("score",)
@@ -1,3 +1,656 @@
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.db.models import Value
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from projects.cache import BIDS_VERSION_KEY, FEED_VERSION_KEY, feed_version
+from projects.models import Bid, Project, ProjectRecommendation
+from projects import recommendations
+from users.models import DeveloperProfile
+from users.revocation import VersionedRefreshToken
+
+User = get_user_model()
+
+
+class ProjectTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user(
+            "client", "client@example.com", "Passw0rd!", is_client=True
+        )
+        cls.developer = User.objects.create_user(
+            "developer", "developer@example.com", "Passw0rd!", is_developer=True
+        )
+        cls.project = Project.objects.create(
+            name="Shop", description="An online shop", client=cls.client_user
+        )
+
+    def api(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+    def place_bid(self, developer=None, project=None, **kwargs):
+        return Bid.objects.create(
+            project=project or self.project,
+            developer=developer or self.developer,
+            proposal="I can build it",
+            **kwargs,
+        )
+
+
+class BidCounterTests(ProjectTestCase):
+    def test_stale_project_save_keeps_counters(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        self.place_bid()
+
+        stale.name = "Shop v2"
+        stale.save()
+
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertEqual(project.name, "Shop v2")
+        self.assertEqual(project.bid_count, 1)
+        self.assertEqual(project.pending_bid_count, 1)
+
+    def test_edit_project_after_bid(self):
+        self.place_bid()
+
+        response = self.api(self.client_user).patch(
+            f"/v1/hire/projects/{self.project.slug}/", {"name": "Shop v2"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.bid_count, 1)
+        self.assertEqual(self.project.pending_bid_count, 1)
+
+    def test_status_changes_and_deletes_move_counters(self):
+        bid = self.place_bid()
+        bid.status = "Rejected"
+        bid.save()
+
+        self.project.refresh_from_db()
+        self.assertEqual(
+            (self.project.pending_bid_count, self.project.rejected_bid_count), (0, 1)
+        )
+
+        bid.delete()
+        self.project.refresh_from_db()
+        self.assertEqual(
+            (self.project.bid_count, self.project.rejected_bid_count), (0, 0)
+        )
+
+
+class BidCreateTests(ProjectTestCase):
+    def post_bid(self):
+        return self.api(self.developer).post(
+            "/v1/hire/bids/",
+            {"project": self.project.slug, "proposal": "I can build it"},
+        )
+
+    def test_second_bid_is_a_bad_request(self):
+        self.assertEqual(self.post_bid().status_code, 201)
+
+        response = self.post_bid()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data[0].code, "duplicate_bid")
+
+    def test_other_integrity_errors_are_not_duplicates(self):
+        with mock.patch.object(
+            Bid.objects, "create", side_effect=IntegrityError("NOT NULL failed")
+        ):
+            with self.assertRaises(IntegrityError):
+                self.post_bid()
+
+
+class SearchVectorTests(ProjectTestCase):
+    """
+    The search vector UPDATE only follows name and description changes
+    """
+
+    def setUp(self):
+        # the PostgreSQL branch, with a vector sqlite can store
+        vendor = mock.patch(
+            "projects.models.connection", mock.Mock(vendor="postgresql")
+        )
+        vector = mock.patch("projects.models.PROJECT_SEARCH_VECTOR", Value(None))
+        for patch in (vendor, vector):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def vector_updates(self, save):
+        project = Project.objects.get(pk=self.project.pk)
+        with CaptureQueriesContext(connection) as queries:
+            save(project)
+        return sum("search_vector" in q["sql"] for q in queries)
+
+    def test_text_change_updates_vector(self):
+        def save(project):
+            project.description = "A bigger shop"
+            project.save()
+
+        self.assertEqual(self.vector_updates(save), 1)
+
+    def test_other_changes_skip_vector(self):
+        def save(project):
+            project.project_status = "Not Available"
+            project.save()
+
+        self.assertEqual(self.vector_updates(save), 0)
+        self.assertEqual(
+            self.vector_updates(lambda project: project.save(update_fields=["name"])),
+            0,
+        )
+
+    def test_bids_skip_vector(self):
+        self.assertEqual(self.vector_updates(lambda project: self.place_bid()), 0)
+
+
+class AcceptBidTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_developer = User.objects.create_user(
+            "other", "other@example.com", "Passw0rd!", is_developer=True
+        )
+
+    def accept(self, bid):
+        return self.api(self.client_user).post(f"/v1/hire/bid/{bid.slug}/accept/")
+
+    def test_accept_rejects_competing_bids(self):
+        bid = self.place_bid()
+        competing = self.place_bid(developer=self.other_developer)
+
+        response = self.accept(bid)
+
+        self.assertEqual(response.status_code, 200)
+        bid.refresh_from_db()
+        competing.refresh_from_db()
+        self.assertEqual((bid.status, competing.status), ("Accepted", "Rejected"))
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.project_status, "Not Available")
+        self.assertEqual(
+            (self.project.accepted_bid_count, self.project.rejected_bid_count), (1, 1)
+        )
+
+    def test_second_accept_conflicts(self):
+        bid = self.place_bid()
+        competing = self.place_bid(developer=self.other_developer)
+        self.accept(bid)
+
+        response = self.accept(competing)
+
+        self.assertEqual(response.status_code, 409)
+        bid.refresh_from_db()
+        competing.refresh_from_db()
+        self.assertEqual((bid.status, competing.status), ("Accepted", "Rejected"))
+
+    def test_accept_on_unavailable_project_conflicts(self):
+        bid = self.place_bid()
+        Project.objects.filter(pk=self.project.pk).update(
+            project_status="Not Available"
+        )
+
+        response = self.accept(bid)
+
+        self.assertEqual(response.status_code, 409)
+        bid.refresh_from_db()
+        self.assertEqual(bid.status, "Pending")
+
+
+class ConditionalGetTests(ProjectTestCase):
+    def get(self, **headers):
+        return self.api(self.client_user).get(
+            f"/v1/hire/projects/{self.project.slug}/", headers=headers
+        )
+
+    def test_detail_sends_validators(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        self.assertIn("Last-Modified", response)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.get()["ETag"]
+
+        response = self.get(if_none_match=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_new_bid_changes_etag(self):
+        etag = self.get()["ETag"]
+        self.place_bid()
+
+        response = self.get(if_none_match=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_edit_changes_etag(self):
+        etag = self.get()["ETag"]
+        self.project.description = "A bigger shop"
+        self.project.save()
+
+        response = self.get(if_none_match=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_public_detail_sends_validators(self):
+        response = self.api(self.developer).get(
+            f"/v1/hire/all-projects/{self.project.slug}/"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+
+
+class QueryCountTests(ProjectTestCase):
+    """
+    Queries per request stay fixed however many projects and bids there are
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.developers = [
+            User.objects.create_user(
+                f"dev{i}", f"dev{i}@example.com", "Passw0rd!", is_developer=True
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def add_projects(self, count):
+        for i in range(count):
+            project = Project.objects.create(
+                name=f"Project {i}", description="Work", client=self.client_user
+            )
+            for developer in self.developers:
+                self.place_bid(developer=developer, project=project)
+        cache.clear()
+
+    def assert_queries(self, num, url, user):
+        client = self.api(user)
+        for projects in (1, 3):
+            self.add_projects(projects)
+            with self.assertNumQueries(num):
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+
+    def test_project_feed(self):
+        self.assert_queries(2, "/v1/hire/all-projects/?expand=", self.developer)
+
+    def test_project_feed_with_bids(self):
+        self.assert_queries(
+            3, "/v1/hire/all-projects/?expand=bids,bids.developer", self.developer
+        )
+
+    def test_client_projects(self):
+        self.assert_queries(2, "/v1/hire/projects/", self.client_user)
+
+    def test_client_projects_with_bids(self):
+        self.assert_queries(
+            3, "/v1/hire/projects/?expand=bids,bids.developer", self.client_user
+        )
+
+    def test_project_detail(self):
+        url = f"/v1/hire/projects/{self.project.slug}/"
+        for developer in self.developers:
+            self.place_bid(developer=developer)
+        # the ETag validators, the project, then its bids with their developers
+        with self.assertNumQueries(3):
+            self.api(self.client_user).get(url)
+        with self.assertNumQueries(2):
+            self.api(self.client_user).get(f"{url}?expand=")
+
+    def test_sparse_fields_skip_columns_and_relations(self):
+        url = f"/v1/hire/projects/{self.project.slug}/?fields=name"
+        self.place_bid()
+        # the ETag validators, then the project's requested columns
+        with self.assertNumQueries(2), CaptureQueriesContext(connection) as queries:
+            response = self.api(self.client_user).get(url)
+
+        self.assertEqual(response.data, {"name": self.project.name})
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertNotIn("description", sql)
+        self.assertNotIn("JOIN", sql)
+
+    def test_bids(self):
+        self.assert_queries(2, "/v1/hire/bids/", self.developers[0])
+
+    def test_bids_without_developer(self):
+        self.assert_queries(2, "/v1/hire/bids/?expand=", self.developers[0])
+
+    def test_bid_detail(self):
+        bid = self.place_bid()
+        url = f"/v1/hire/bids/{bid.slug}/"
+        with self.assertNumQueries(1):
+            self.api(self.developer).get(url)
+        with self.assertNumQueries(1):
+            self.api(self.developer).get(f"{url}?expand=")
+
+
+class CursorPaginationTests(ProjectTestCase):
+    url = "/v1/hire/all-projects/"
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_pages_are_newest_first(self):
+        newer = Project.objects.create(
+            name="Newer", description="Work", client=self.client_user
+        )
+
+        response = self.api(self.developer).get(self.url, {"pagination": "cursor"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(
+            [p["name"] for p in response.data["results"]], [newer.name, "Shop"]
+        )
+
+    def test_page_numbers_are_newest_first_like_the_async_feed(self):
+        Project.objects.create(
+            name="Newer", description="Work", client=self.client_user
+        )
+        access = VersionedRefreshToken.for_user(self.developer).access_token
+
+        sync = self.api(self.developer).get(self.url)
+        async_ = self.client.get(
+            "/v1/hire/async/all-projects/", HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+
+        names = [p["name"] for p in sync.data["results"]]
+        self.assertEqual(names, ["Newer", "Shop"])
+        self.assertEqual([p["name"] for p in async_.json()["results"]], names)
+
+    def test_cursor_with_search_is_rejected(self):
+        response = self.api(self.developer).get(
+            self.url, {"pagination": "cursor", "q": "shop"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pagination", response.data)
+
+    def test_cursor_with_other_ordering_is_rejected(self):
+        response = self.api(self.developer).get(
+            self.url, {"pagination": "cursor", "ordering": "-bid_count"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
+class FeedCacheTests(ProjectTestCase):
+    url = "/v1/hire/all-projects/"
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_bumps(self, key, change, bumped=True):
+        before = feed_version(key)
+        change()
+        self.assertEqual(feed_version(key) != before, bumped)
+
+    def test_available_project_changes_bump_the_feed(self):
+        def save():
+            self.project.name = "Shop v2"
+            self.project.save()
+
+        self.assert_bumps(FEED_VERSION_KEY, save)
+
+    def test_leaving_the_feed_bumps_it(self):
+        def close():
+            self.project.project_status = "Not Available"
+            self.project.save()
+
+        self.assert_bumps(FEED_VERSION_KEY, close)
+        # already out of the feed
+        self.assert_bumps(FEED_VERSION_KEY, self.project.save, bumped=False)
+
+    def test_bids_only_bump_the_bids_version(self):
+        self.assert_bumps(FEED_VERSION_KEY, self.place_bid, bumped=False)
+        self.assert_bumps(
+            BIDS_VERSION_KEY,
+            lambda: self.place_bid(
+                developer=User.objects.create_user(
+                    "other", "other@example.com", "Passw0rd!", is_developer=True
+                )
+            ),
+        )
+
+    def test_every_page_sees_new_bids(self):
+        client = self.api(self.developer)
+        by_bids = {"ordering": "-bid_count"}
+        client.get(self.url)
+        client.get(self.url, by_bids)
+        self.place_bid()
+
+        self.assertEqual(client.get(self.url).data["results"][0]["bid_count"], 1)
+        self.assertEqual(
+            client.get(self.url, by_bids).data["results"][0]["bid_count"], 1
+        )
+
+
+class ProjectImportTests(ProjectTestCase):
+    url = "/v1/hire/projects/import/"
+
+    def row(self, name="Imported", **kwargs):
+        return {
+            "name": name,
+            "description": "Imported project",
+            "project_category": "Web Development",
+            "project_type": "Full Time",
+            "project_duration": "3 months",
+            "project_status": "Available",
+            "project_progress": "Pending",
+            "min_price": 100,
+            "max_price": 500,
+            **kwargs,
+        }
+
+    def post(self, body, content_type):
+        return self.api(self.client_user).generic(
+            "POST", self.url, body, content_type=content_type
+        )
+
+    def test_json_rows_are_created_and_errors_reported(self):
+        rows = [self.row("One"), self.row("Two"), self.row(name="")]
+
+        response = self.post(json.dumps(rows), "application/json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [3])
+        imported = Project.objects.filter(name__in=["One", "Two"])
+        self.assertEqual(imported.count(), 2)
+        self.assertTrue(all(project.slug for project in imported))
+        self.assertTrue(all(project.client == self.client_user for project in imported))
+
+    def test_ndjson_reports_unparseable_lines(self):
+        body = "\n".join([json.dumps(self.row("One")), "{not json", ""])
+
+        response = self.post(body, "application/x-ndjson")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["errors"][0]["row"], 2)
+
+    def test_csv(self):
+        row = self.row("From CSV")
+        body = ",".join(row) + "\n" + ",".join(str(value) for value in row.values())
+
+        response = self.post(body, "text/csv")
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertTrue(Project.objects.filter(name="From CSV").exists())
+
+    def test_nothing_valid_is_a_bad_request(self):
+        response = self.post(json.dumps([self.row(name="")]), "application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["created"], 0)
+
+    def test_unsupported_content_type(self):
+        response = self.post("<projects/>", "application/xml")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_rows_are_inserted_in_batches(self):
+        rows = [self.row(f"Project {i}") for i in range(20)]
+        # one INSERT for the batch (plus savepoints), not one per row
+        with CaptureQueriesContext(connection) as queries:
+            self.post(json.dumps(rows), "application/json")
+
+        inserts = [q for q in queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            Project.objects.filter(name__startswith="Project ").count(), 20
+        )
+
+
+class AsyncProjectListTests(ProjectTestCase):
+    url = "/v1/hire/async/all-projects/"
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.app = Project.objects.create(
+            name="App",
+            description="A data pipeline",
+            client=cls.client_user,
+            project_category="Data Science",
+        )
+
+    def setUp(self):
+        cache.clear()
+        access = VersionedRefreshToken.for_user(self.developer).access_token
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {access}"
+
+    def names(self, query):
+        response = self.client.get(self.url, query)
+        self.assertEqual(response.status_code, 200, response.json())
+        return [project["name"] for project in response.json()["results"]]
+
+    def test_filters_match_the_sync_feed(self):
+        query = {"project_category": "Data Science"}
+        self.assertEqual(self.names(query), ["App"])
+
+        sync = self.api(self.developer).get("/v1/hire/all-projects/", query)
+        self.assertEqual([p["name"] for p in sync.data["results"]], ["App"])
+
+    def test_invalid_filter_is_a_bad_request(self):
+        response = self.client.get(self.url, {"project_category": "Knitting"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_ordering_whitelist(self):
+        self.place_bid(project=self.app)
+
+        self.assertEqual(self.names({"ordering": "-bid_count"}), ["App", "Shop"])
+        self.assertEqual(self.names({"ordering": "created_at"}), ["Shop", "App"])
+        # unknown fields are ignored, newest first
+        self.assertEqual(self.names({"ordering": "description"}), ["App", "Shop"])
+
+    def test_facets(self):
+        response = self.client.get(self.url, {"facets": "1"})
+
+        facets = response.json()["facets"]
+        self.assertEqual(facets["project_category"]["Data Science"], 1)
+
+    def test_cursor_pagination_is_rejected(self):
+        response = self.client.get(self.url, {"pagination": "cursor"})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class RecommendationTests(ProjectTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        DeveloperProfile.objects.create(
+            developer=cls.developer, skills="django, python, rest api"
+        )
+        cls.data_developer = User.objects.create_user(
+            "data", "data@example.com", "Passw0rd!", is_developer=True
+        )
+        DeveloperProfile.objects.create(
+            developer=cls.data_developer, skills="pandas, etl"
+        )
+        cls.api_project = Project.objects.create(
+            name="Django API",
+            description="A django rest api for our python backend",
+            client=cls.client_user,
+        )
+        cls.python_project = Project.objects.create(
+            name="Scripts", description="Python scripts", client=cls.client_user
+        )
+        cls.etl_project = Project.objects.create(
+            name="Pipeline", description="Nightly etl jobs", client=cls.client_user
+        )
+
+    def recommended(self, developer):
+        return list(
+            ProjectRecommendation.objects.filter(developer=developer).values_list(
+                "project__name", flat=True
+            )
+        )
+
+    def test_best_match_ranks_first(self):
+        recommendations.rebuild_recommendations()
+
+        self.assertEqual(self.recommended(self.developer), ["Django API", "Scripts"])
+        self.assertEqual(self.recommended(self.data_developer), ["Pipeline"])
+
+    def test_top_k_cut_off(self):
+        recommendations.rebuild_recommendations(top_k=1)
+
+        self.assertEqual(self.recommended(self.developer), ["Django API"])
+
+    def test_incremental_run_only_recomputes_affected_developers(self):
+        recommendations.rebuild_recommendations()
+        since = timezone.now()
+        untouched = ProjectRecommendation.objects.get(developer=self.data_developer)
+        self.project.description = "An online shop built with django"
+        self.project.save()
+
+        recommendations.refresh_recommendations(since)
+
+        self.assertIn("Shop", self.recommended(self.developer))
+        self.assertEqual(
+            ProjectRecommendation.objects.get(developer=self.data_developer).updated_at,
+            untouched.updated_at,
+        )
+
+    def test_edit_during_a_run_is_picked_up_by_the_next(self):
+        developer_documents = recommendations.developer_documents
+
+        def edit_then_read(*args):
+            # saved after the run read the projects, before it stores results
+            if not ProjectRecommendation.objects.exists():
+                Project.objects.filter(pk=self.project.pk).update(
+                    description="An online shop built with django",
+                    updated_at=timezone.now(),
+                )
+            return developer_documents(*args)
+
+        with mock.patch.object(recommendations, "developer_documents", edit_then_read):
+            recommendations.rebuild_recommendations()
+        self.assertNotIn("Shop", self.recommended(self.developer))
+
+        recommendations.refresh_recommendations(recommendations.last_refreshed())
 
-# Create your tests here.
+        self.assertIn("Shop", self.recommended(self.developer))
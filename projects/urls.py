@@ -1,22 +1,29 @@
 from django.urls import path
 
+from projects import async_views
 from projects.views import (
     ProjectListCreateView,
+    ProjectImportView,
     ProjectDetailView,
     BidDetailView,
     BidListCreateView,
     ProjectListView,
     ProjectsRetrieveView,
+    RecommendedProjectListView,
     AcceptBidsView,
+    AcceptBidView,
     project_category_choices,
     project_status_choices,
     project_progress_choices,
     project_type_choices,
-    TenProjectListView
+    TenProjectListView,
+    ProjectExportView,
+    BidExportView,
 )
 
 urlpatterns = [
     path("projects/", ProjectListCreateView.as_view(), name="project-list-create"),
+    path("projects/import/", ProjectImportView.as_view(), name="project-import"),
     path("projects/<str:slug>/", ProjectDetailView.as_view(), name="project-detail"),
     path("all-projects/", ProjectListView.as_view(), name="project-list"),
     path(
@@ -24,12 +31,27 @@ urlpatterns = [
         ProjectsRetrieveView.as_view(),
         name="projects-details",
     ),
+    path(
+        "recommended/",
+        RecommendedProjectListView.as_view(),
+        name="recommended-projects",
+    ),
     path("bids/", BidListCreateView.as_view(), name="bid-list-create"),
     path("bids/<str:slug>/", BidDetailView.as_view(), name="bid-detail"),
     path("bid/<str:slug>/", AcceptBidsView.as_view(), name="accept-bids"),
+    path("bid/<str:slug>/accept/", AcceptBidView.as_view(), name="accept-bid"),
     path("category/", project_category_choices, name="project-category"),
     path("type/", project_type_choices, name="project-type"),
     path("status/", project_status_choices, name="project-status"),
     path("progress/", project_progress_choices, name="project-progress"),
     path("ten-projects/", TenProjectListView.as_view(), name="ten-projects"),
+    path("export/projects/", ProjectExportView.as_view(), name="project-export"),
+    path("export/bids/", BidExportView.as_view(), name="bid-export"),
+    # async variants, for ASGI deployments
+    path("async/all-projects/", async_views.project_list, name="async-project-list"),
+    path(
+        "async/all-projects/<str:slug>/",
+        async_views.project_detail,
+        name="async-projects-details",
+    ),
 ]
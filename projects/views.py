@@ -1,36 +1,134 @@
-from rest_framework import generics, status
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters, generics, status
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from django.db import transaction
+from django.db.models import Case, F, Max, Value, When
+from django.db.models.functions import Coalesce, Greatest
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.cache import cache_page
 from rest_framework.views import APIView
 
+from projects.cache import feed_cache_key, get_or_set_locked
+from projects.filters import FEED_ORDERING_FIELDS, BidFilter, ProjectFilter
+from projects.exports import (
+    BID_COLUMNS,
+    PROJECT_COLUMNS,
+    bid_export_queryset,
+    project_export_queryset,
+)
+from projects.imports import ImportFormatError, import_projects, iter_rows
 from projects.models import Project, Bid
-from projects.serializers import ProjectSerializer, BidSerializer
+from projects.serializers import (
+    ProjectSerializer,
+    BidSerializer,
+    RecommendedProjectSerializer,
+    expand_param,
+    split_param,
+)
+from hireadeveloper.exports import ExportView
+from users.mixins import ConditionalRetrieveMixin
+from hireadeveloper.pagination import OptionalCursorPagination
 from users.permissions import IsClient, IsDeveloper, IsDeveloperOrReadOnly
 
 
+class SparseFieldsViewMixin:
+    """
+    Passes ?fields= and ?expand= on to the serializer.
+    Requests without ?expand= get the view's default_expand.
+    """
+
+    default_expand = ()
+
+    def get_expand(self) -> set:
+        if "expand" in self.request.query_params:
+            return expand_param(self.request.query_params["expand"])
+        return expand_param(",".join(self.default_expand))
+
+    def get_fields(self) -> set:
+        return split_param(self.request.query_params.get("fields"))
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_fields() or None)
+        kwargs.setdefault("expand", self.get_expand())
+        return super().get_serializer(*args, **kwargs)
+
+
+class ProjectExpandMixin(SparseFieldsViewMixin):
+    def expand_queryset(self, queryset):
+        """
+        Only load the columns, bids and developers the response will contain
+        """
+        fields = self.get_fields()
+        expand = self.get_expand()
+        if "bids" in expand and (not fields or "bids" in fields):
+            queryset = queryset.with_bids(developers="bids.developer" in expand)
+        if not fields or "client" in fields:
+            queryset = queryset.select_related("client")
+        if fields and self.request.method in SAFE_METHODS:
+            # writes save every field, only reads can skip columns;
+            # created_at is the cursor position, client_id the owner check
+            columns = {field.name for field in Project._meta.concrete_fields}
+            queryset = queryset.only("id", "created_at", "client", *(fields & columns))
+        return queryset
+
+
+class ProjectConditionalMixin(ConditionalRetrieveMixin):
+    def get_modified_state(self, queryset):
+        """
+        A project changes when it is saved or when one of its bids
+        is saved or added; the stored bid_count also catches deletes
+        """
+        return (
+            queryset.annotate(
+                last_modified=Greatest(
+                    "updated_at", Coalesce(Max("bids__updated_at"), "updated_at")
+                ),
+            )
+            .values_list("last_modified", "bid_count")
+            .first()
+        )
+
+
+class BidExpandMixin(SparseFieldsViewMixin):
+    default_expand = ("developer",)
+
+    def expand_queryset(self, queryset):
+        queryset = queryset.select_related("project")
+        if "developer" in self.get_expand():
+            queryset = queryset.select_related("developer")
+        return queryset
+
+
 """
 Projects views
 """
 
 
-class ProjectListCreateView(generics.ListCreateAPIView):
+class ProjectListCreateView(ProjectExpandMixin, generics.ListCreateAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Project.objects.filter(client=self.request.user)
+        # project_client_recent_idx
+        return self.expand_queryset(
+            Project.objects.filter(client=self.request.user).order_by("-created_at")
+        )
 
 
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ProjectDetailView(
+    ProjectConditionalMixin, ProjectExpandMixin, generics.RetrieveUpdateDestroyAPIView
+):
     serializer_class = ProjectSerializer
     permission_classes = [
         IsAuthenticated,
         IsClient,
     ]
     lookup_field = "slug"
+    default_expand = ("bids.developer",)
 
     def delete(self, request: Request, *args, **kwargs) -> Response:
         """
@@ -43,36 +141,120 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
         )
 
     def get_queryset(self):
-        return Project.objects.filter(client=self.request.user)
+        return self.expand_queryset(Project.objects.filter(client=self.request.user))
 
 
-class ProjectListView(generics.ListAPIView):
+class ProjectImportView(APIView):
+    """
+    Bulk import projects from a JSON array, NDJSON or CSV body.
+    Valid rows are created, invalid rows are reported by row number.
+    """
+
+    permission_classes = [
+        IsAuthenticated,
+        IsClient,
+    ]
+
+    def post(self, request: Request, format: str = "json") -> Response:
+        try:
+            report = import_projects(
+                iter_rows(request), request.user, {"request": request}
+            )
+        except ImportFormatError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if report["created"] == 0 and report["errors"]:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED)
+
+
+class ProjectListView(ProjectExpandMixin, generics.ListAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [
         IsAuthenticated,
     ]
-    queryset = Project.objects.filter(project_status="Available")
+    pagination_class = OptionalCursorPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = ProjectFilter
+    ordering_fields = FEED_ORDERING_FIELDS
+
+    def get_queryset(self):
+        queryset = self.expand_queryset(
+            Project.objects.filter(project_status="Available")
+        )
+        terms = self.request.query_params.get("q", "").strip()
+        if terms:
+            return queryset.search(terms)
+        # newest first unless ?ordering= is given, served by the
+        # project_available_recent_idx partial index
+        return queryset.order_by("-created_at")
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        """
+        Pages are served from the feed cache,
+        which project and bid saves/deletes invalidate
+        """
+        data = get_or_set_locked(
+            feed_cache_key(request), lambda: self.list_data(request, *args, **kwargs)
+        )
+        return Response(data)
+
+    def list_data(self, request: Request, *args, **kwargs):
+        data = super().list(request, *args, **kwargs).data
+        if request.query_params.get("facets") in ("1", "true"):
+            # counts for the filter sidebar, over the same filtered feed
+            data["facets"] = self.filter_queryset(self.get_queryset()).facet_counts()
+        return data
 
 
-class TenProjectListView(generics.ListAPIView):
+class TenProjectListView(ProjectExpandMixin, generics.ListAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [
         IsAuthenticated,
     ]
 
     def get_queryset(self):
-        return Project.objects.filter(client=self.request.user)[:10]
+        queryset = self.expand_queryset(
+            Project.objects.filter(client=self.request.user).order_by("-created_at")
+        )
+        return queryset[:10]
 
 
-class ProjectsRetrieveView(generics.RetrieveAPIView):
+class ProjectsRetrieveView(
+    ProjectConditionalMixin, ProjectExpandMixin, generics.RetrieveAPIView
+):
     serializer_class = ProjectSerializer
     permission_classes = [
         IsAuthenticated,
     ]
     lookup_field = "slug"
+    default_expand = ("bids.developer",)
+
+    def get_queryset(self):
+        return self.expand_queryset(Project.objects.filter(project_status="Available"))
+
+
+class RecommendedProjectListView(ProjectExpandMixin, generics.ListAPIView):
+    """
+    Precomputed recommendations for the developer, best match first
+    (see projects.recommendations)
+    """
+
+    serializer_class = RecommendedProjectSerializer
+    permission_classes = [
+        IsAuthenticated,
+        IsDeveloper,
+    ]
 
     def get_queryset(self):
-        return Project.objects.filter(project_status="Available")
+        return self.expand_queryset(
+            Project.objects.filter(
+                recommendations__developer=self.request.user,
+                project_status="Available",
+            )
+            .annotate(score=F("recommendations__score"))
+            .order_by("-score")
+        )
 
 
 """
@@ -80,18 +262,22 @@ Bids views
 """
 
 
-class BidListCreateView(generics.ListCreateAPIView):
+class BidListCreateView(BidExpandMixin, generics.ListCreateAPIView):
     serializer_class = BidSerializer
     permission_classes = [
         IsAuthenticated,
         IsDeveloperOrReadOnly,
     ]
+    pagination_class = OptionalCursorPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = BidFilter
+    ordering_fields = ["created_at"]
 
     def get_queryset(self):
-        return Bid.objects.filter(developer=self.request.user)
+        return self.expand_queryset(Bid.objects.filter(developer=self.request.user))
 
 
-class BidDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BidDetailView(BidExpandMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = BidSerializer
     permission_classes = [
         IsAuthenticated,
@@ -100,24 +286,29 @@ class BidDetailView(generics.RetrieveUpdateDestroyAPIView):
     lookup_field = "slug"
 
     def get_queryset(self):
-        return Bid.objects.filter(developer=self.request.user)
+        return self.expand_queryset(Bid.objects.filter(developer=self.request.user))
 
 
+# choices are constants, they only change on deploy
+@cache_page(60 * 60 * 24)
 def project_category_choices(request):
     choices = Project.PROJECT_CATEGORY
     return JsonResponse(choices, safe=False)
 
 
+@cache_page(60 * 60 * 24)
 def project_type_choices(request):
     choices = Project.PROJECT_TYPE
     return JsonResponse(choices, safe=False)
 
 
+@cache_page(60 * 60 * 24)
 def project_status_choices(request):
     choices = Project.PROJECT_STATUS
     return JsonResponse(choices, safe=False)
 
 
+@cache_page(60 * 60 * 24)
 def project_progress_choices(request):
     choices = Project.PROJECT_PROGRESS
     return JsonResponse(choices, safe=False)
@@ -128,12 +319,82 @@ Accepting bids
 """
 
 
-class AcceptBidsView(generics.RetrieveUpdateAPIView):
+class AcceptBidsView(BidExpandMixin, generics.RetrieveUpdateAPIView):
     serializer_class = BidSerializer
     permission_classes = [
         IsAuthenticated,
     ]
     lookup_field = "slug"
 
+    def get_queryset(self):
+        return self.expand_queryset(
+            Bid.objects.filter(project__client=self.request.user)
+        )
+
+
+class AcceptBidView(generics.GenericAPIView):
+    """
+    Accept a bid in one round trip:
+    the bid is accepted, every other bid on the project is rejected,
+    and the project is taken off the feed, all in one transaction.
+    Returns the updated project with its bids.
+    """
+
+    serializer_class = ProjectSerializer
+    permission_classes = [
+        IsAuthenticated,
+    ]
+    lookup_field = "slug"
+
     def get_queryset(self):
         return Bid.objects.filter(project__client=self.request.user)
+
+    def post(self, request: Request, *args, **kwargs) -> Response:
+        bid = self.get_object()
+
+        with transaction.atomic():
+            project = Project.objects.select_for_update().get(pk=bid.project_id)
+            # re-checked under the lock, a concurrent accept may have won
+            if project.project_status != "Available" or project.accepted_bid_count > 0:
+                return Response(
+                    {"detail": "A bid has already been accepted for this project."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            # one UPDATE for the accepted bid and all competing bids
+            Bid.objects.filter(project=project).update(
+                status=Case(
+                    When(pk=bid.pk, then=Value("Accepted")),
+                    default=Value("Rejected"),
+                ),
+                updated_at=timezone.now(),
+            )
+            # queryset updates skip the Bid signals that maintain the counters
+            Project.objects.filter(pk=project.pk).rebuild_bid_counters()
+            project.project_status = "Not Available"
+            project.project_progress = "Active"
+            project.save(
+                update_fields=["project_status", "project_progress", "updated_at"]
+            )
+
+        project = (
+            Project.objects.select_related("client").with_bids().get(pk=project.pk)
+        )
+        serializer = self.get_serializer(project, expand={"bids", "bids.developer"})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+"""
+Exports
+"""
+
+
+class ProjectExportView(ExportView):
+    export_name = "projects"
+    columns = PROJECT_COLUMNS
+    queryset_factory = project_export_queryset
+
+
+class BidExportView(ExportView):
+    export_name = "bids"
+    columns = BID_COLUMNS
+    queryset_factory = bid_export_queryset
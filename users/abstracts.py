@@ -1,6 +1,7 @@
 import uuid
 
 from django.db import models
+from cloudinary import CloudinaryResource
 from cloudinary.models import CloudinaryField
 
 
@@ -25,10 +26,66 @@ class UniversalIdModel(models.Model):
         abstract = True
 
 
+def file_value(value):
+    """
+    The value a file field stores, None when empty
+    """
+    if isinstance(value, CloudinaryResource):
+        return value.get_prep_value()
+    return value or None
+
+
+class StoredFilesMixin:
+    """
+    Remembers the stored values of file_fields as loaded,
+    so saves and deletes can move StoredFile reference counts
+    """
+
+    file_fields = ()
+    _stored_files = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_files = {
+            name: file_value(getattr(instance, name))
+            for name in cls.file_fields
+            if name in field_names
+        }
+        return instance
+
+    def load_stored_files(self) -> None:
+        """
+        Read the stored values of file fields deferred when the instance
+        was loaded (request.user defers the image, see users.authentication),
+        so a delete releases every file
+        """
+        if self._stored_files is None or self.pk is None:
+            return
+        missing = [name for name in self.file_fields if name not in self._stored_files]
+        if not missing:
+            return
+        row = type(self)._base_manager.filter(pk=self.pk).values(*missing).first()
+        if row is not None:
+            self._stored_files.update(
+                {name: file_value(value) for name, value in row.items()}
+            )
+
+    def current_files(self) -> dict:
+        deferred = self.get_deferred_fields()
+        return {
+            name: file_value(getattr(self, name))
+            for name in self.file_fields
+            if name not in deferred
+        }
+
+
 class AbstractProfile(models.Model):
     firstname = models.CharField(blank=True, max_length=500, null=True)
     lastname = models.CharField(blank=True, max_length=500, null=True)
     image = CloudinaryField("images", null=True, blank=True)
+    # stored values of the resized copies, see users.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     about = models.TextField(blank=True, null=True)
 
     class Meta:
@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
-from users.models import DeveloperProfile
+from users.models import DeveloperProfile, OutgoingEmail, Skill
 
 User = get_user_model()
 
 admin.site.register(User)
 admin.site.register(DeveloperProfile)
+admin.site.register(Skill)
+admin.site.register(OutgoingEmail)
@@ -0,0 +1,223 @@
+"""
+Async views, served natively when running under an ASGI server
+(e.g. uvicorn hireadeveloper.asgi:application).
+
+DRF views are synchronous, so these are plain Django async views that
+reuse the DRF serializers on fully loaded objects and query with the
+async ORM. Login and registration hash passwords in users.hashers'
+thread pool instead of on the event loop.
+"""
+
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password, verify_password
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from users.authentication import CachedJWTAuthentication
+from users.hashers import offload
+from users.models import DeveloperProfile, match_skills
+from users.revocation import VersionedRefreshToken
+from users.serializers import (
+    DeveloperProfileSerializer,
+    DeveloperSerializer,
+    UserSerializer,
+)
+
+User = get_user_model()
+
+PAGE_SIZE = settings.REST_FRAMEWORK["PAGE_SIZE"]
+
+
+def async_login_required(view):
+    """
+    JWT authentication for async views, same rules as the DRF views
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await sync_to_async(CachedJWTAuthentication().authenticate)(
+                request
+            )
+        except (AuthenticationFailed, InvalidToken) as e:
+            detail = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+            return JsonResponse(detail, status=401)
+        if result is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=401,
+            )
+        request.user, request.auth = result
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+async def apaginate(request, queryset, serialize) -> JsonResponse:
+    """
+    Page number pagination with the same response shape as the DRF views
+    """
+    data = await apage(request, queryset, serialize)
+    if data is None:
+        return JsonResponse({"detail": "Invalid page."}, status=404)
+    return JsonResponse(data)
+
+
+async def apage(request, queryset, serialize):
+    """
+    The response data of apaginate, None for a page past the end
+    """
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+    count = await queryset.acount()
+    offset = (page - 1) * PAGE_SIZE
+    if offset and offset >= count:
+        return None
+
+    objects = [obj async for obj in queryset[offset : offset + PAGE_SIZE]]
+    url = request.build_absolute_uri()
+    previous = None
+    if page > 1:
+        previous = (
+            replace_query_param(url, "page", page - 1)
+            if page > 2
+            else remove_query_param(url, "page")
+        )
+    return {
+        "count": count,
+        "next": (
+            replace_query_param(url, "page", page + 1)
+            if offset + PAGE_SIZE < count
+            else None
+        ),
+        "previous": previous,
+        "results": serialize(objects),
+    }
+
+
+async def aget_or_none(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except (queryset.model.DoesNotExist, ValueError, ValidationError):
+        return None
+
+
+def not_found() -> JsonResponse:
+    return JsonResponse({"detail": "Not found."}, status=404)
+
+
+@require_GET
+@async_login_required
+async def developer_list(request):
+    queryset = match_skills(
+        User.objects.filter(is_developer=True), request.GET.get("skills")
+    )
+    return await apaginate(
+        request,
+        queryset,
+        lambda developers: DeveloperSerializer(
+            developers, many=True, context={"request": request}
+        ).data,
+    )
+
+
+@require_GET
+@async_login_required
+async def developer_profile(request, developer):
+    profile = await aget_or_none(
+        DeveloperProfile.objects.select_related("developer"), developer=developer
+    )
+    if profile is None:
+        return not_found()
+    serializer = DeveloperProfileSerializer(profile, context={"request": request})
+    return JsonResponse(serializer.data)
+
+
+def request_data(request):
+    """
+    JSON or form body, what DRF's default parsers accept
+    """
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return {**request.POST.dict(), **request.FILES.dict()}
+
+
+def token_pair(user) -> dict:
+    refresh = VersionedRefreshToken.for_user(user)
+    return {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    """
+    Same contract as the login (TokenObtainPairView) endpoint,
+    with the password check run in the hashing pool
+    """
+    data = request_data(request)
+    if data is None:
+        return JsonResponse({"detail": "Malformed request body."}, status=400)
+    missing = {
+        field: ["This field is required."]
+        for field in (User.USERNAME_FIELD, "password")
+        if not data.get(field)
+    }
+    if missing:
+        return JsonResponse(missing, status=400)
+
+    password = data["password"]
+    user = await User.objects.filter(
+        **{User.USERNAME_FIELD: data[User.USERNAME_FIELD]}
+    ).afirst()
+    if user is None:
+        # hash anyway so unknown accounts answer as slowly as wrong passwords
+        await offload(make_password, password)
+        valid = False
+    else:
+        valid, must_update = await offload(verify_password, password, user.password)
+        if valid and must_update:
+            # transparent upgrade to the current hasher tier
+            user.password = await offload(make_password, password)
+            await user.asave(update_fields=["password"])
+
+    if not valid or not getattr(user, "is_active", True):
+        return JsonResponse(
+            {"detail": "No active account found with the given credentials"},
+            status=401,
+        )
+    return JsonResponse(token_pair(user))
+
+
+@csrf_exempt
+@require_POST
+async def client_register(request):
+    """
+    Same contract as register/client/, the new password
+    is hashed in the hashing pool
+    """
+    data = request_data(request)
+    if data is None:
+        return JsonResponse({"detail": "Malformed request body."}, status=400)
+    serializer = UserSerializer(data=data, context={"request": request})
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=400)
+
+    password_hash = await offload(make_password, serializer.validated_data["password"])
+    user = await sync_to_async(serializer.save)(password_hash=password_hash)
+    return JsonResponse({**serializer.data, **token_pair(user)}, status=201)
@@ -0,0 +1,53 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from users.cache import get_cached_user
+from users.revocation import VERSION_CLAIM
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication with request.user served from users.cache,
+    the profile text and image columns are not loaded
+    """
+
+    deferred_fields = ("about", "image", "image_variants")
+
+    def load_user(self, user_id):
+        return (
+            self.user_model.objects.defer(*self.deferred_fields)
+            .filter(**{api_settings.USER_ID_FIELD: user_id})
+            .first()
+        )
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id, self.load_user)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        # tokens issued before versioning carry no claim and count as version 0
+        if validated_token.get(VERSION_CLAIM, 0) != user.token_version:
+            raise AuthenticationFailed(
+                _("Token has been revoked"), code="token_revoked"
+            )
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
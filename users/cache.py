@@ -0,0 +1,32 @@
+"""
+Short-lived cache of authenticated users
+
+JWT authentication resolves request.user from here instead of the database,
+User saves and deletes evict the entry (see users.models receivers) and the
+timeout bounds staleness for writes that skip signals (QuerySet.update).
+"""
+
+from django.core.cache import cache
+
+USER_CACHE_TIMEOUT = 60
+
+
+def user_cache_key(user_id) -> str:
+    return f"users:auth:{user_id}"
+
+
+def get_cached_user(user_id, load):
+    """
+    The cached user for user_id, or load(user_id) cached for next time.
+    Users that don't exist are not cached.
+    """
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = load(user_id)
+        cache.set(key, user, USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_user(user_id) -> None:
+    cache.delete(user_cache_key(user_id))
@@ -0,0 +1,150 @@
+"""
+Resumable chunked uploads
+
+Large project and proposal files are sent in chunks that survive a
+dropped connection:
+
+1. POST /v1/users/uploads/chunked/ {"kind", "filename", "size"} starts an
+   upload and returns its id and the largest chunk accepted,
+2. PUT /v1/users/uploads/chunked/<id>/ sends the next chunk as the raw body
+   with Content-Range: bytes <start>-<end>/<size>. It is streamed into a
+   temp file under CHUNKED_UPLOAD_ROOT a buffer at a time, so no chunk is
+   held in memory, and no row lock is held while it arrives. A chunk that
+   does not start at the received offset gets 409 and that offset; after a network error GET /v1/users/uploads/chunked/<id>/
+   tells where to resume,
+3. POST /v1/users/uploads/chunked/<id>/finalize/ stores the assembled file
+   (content-addressed, see users.uploads) and returns an upload token the
+   client submits as the file field: {"upload": token}.
+
+Uploads not touched for CHUNKED_UPLOAD_EXPIRY are deleted by
+prune_chunked_uploads.
+"""
+
+import os
+import re
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from users.models import ChunkedUpload
+from users.uploads import store_upload, upload_token
+
+CHUNKED_KINDS = ("resume", "project_file", "bid_file")
+READ_BUFFER = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+def expiry_cutoff():
+    return timezone.now() - timedelta(seconds=settings.CHUNKED_UPLOAD_EXPIRY)
+
+
+def active_uploads(user):
+    return ChunkedUpload.objects.filter(owner=user, updated_at__gte=expiry_cutoff())
+
+
+def parse_content_range(header, content_length, upload) -> tuple:
+    """
+    (start, length) of a chunk of upload, from its Content-Range
+    """
+    match = CONTENT_RANGE_RE.fullmatch(header or "")
+    if match is None:
+        raise serializers.ValidationError(
+            "Content-Range must be bytes <start>-<end>/<size>.", code="invalid_range"
+        )
+    start, end, size = (int(group) for group in match.groups())
+    length = end - start + 1
+    if size != upload.size or length < 1 or end >= size:
+        raise serializers.ValidationError(
+            "Content-Range is outside the upload.", code="invalid_range"
+        )
+    if length > settings.UPLOAD_CHUNK_SIZE:
+        raise serializers.ValidationError(
+            f"Chunks are limited to {settings.UPLOAD_CHUNK_SIZE} bytes.",
+            code="chunk_too_large",
+        )
+    if str(content_length) != str(length):
+        raise serializers.ValidationError(
+            "Content-Length does not match Content-Range.", code="invalid_range"
+        )
+    return start, length
+
+
+def write_chunk(upload, stream, start: int, length: int) -> int:
+    """
+    Copy length bytes of stream into the upload's temp file at start,
+    returns the bytes received (fewer if the client went away).
+    Nothing outside the chunk's range is touched, so a retried or
+    concurrent copy of the chunk only rewrites the same bytes.
+    """
+    os.makedirs(os.path.dirname(upload.path), exist_ok=True)
+    descriptor = os.open(upload.path, os.O_WRONLY | os.O_CREAT, 0o600)
+    written = 0
+    with os.fdopen(descriptor, "wb") as destination:
+        destination.seek(start)
+        while written < length:
+            data = stream.read(min(READ_BUFFER, length - written))
+            if not data:
+                break
+            destination.write(data)
+            written += len(data)
+    return written
+
+
+def advance_offset(upload, start: int, written: int) -> bool:
+    """
+    Move the offset past a written chunk, compare-and-set so no lock is
+    held while the chunk is read. False when another request moved it
+    first or the upload was finalized.
+    """
+    advanced = ChunkedUpload.objects.filter(
+        pk=upload.pk, offset=start, value=""
+    ).update(offset=start + written, updated_at=timezone.now())
+    upload.refresh_from_db(fields=["offset", "value", "updated_at"])
+    return bool(advanced)
+
+
+def finalize_upload(upload) -> str:
+    """
+    Store the assembled file (once), returns an upload token for it.
+    Runs outside any transaction, the storage upload can take a while.
+    """
+    if not upload.value:
+        try:
+            with open(upload.path, "rb") as assembled:
+                resource = store_upload(
+                    upload.owner, upload.kind, File(assembled, name=upload.filename)
+                )
+        except FileNotFoundError:
+            # finalized concurrently, its temp file is already gone
+            upload.refresh_from_db()
+            if not upload.value:
+                raise
+        else:
+            upload.value = resource.get_prep_value()
+            with transaction.atomic():
+                ChunkedUpload.objects.filter(pk=upload.pk).update(
+                    value=upload.value, updated_at=timezone.now()
+                )
+                # only once value is saved, a retry still finds the file
+                transaction.on_commit(partial(remove_temp_file, upload.path))
+    return upload_token(upload.owner, upload.kind, None, value=upload.value)
+
+
+def remove_temp_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def prune_chunked_uploads() -> int:
+    """
+    Delete expired uploads and their temp files
+    """
+    deleted, _ = ChunkedUpload.objects.filter(updated_at__lt=expiry_cutoff()).delete()
+    return deleted
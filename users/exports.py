@@ -0,0 +1,23 @@
+from hireadeveloper.exports import apply_export_filters
+from users.models import DeveloperProfile
+
+DEVELOPER_COLUMNS = (
+    ("id", "id"),
+    ("username", "developer__username"),
+    ("email", "developer__email"),
+    ("firstname", "developer__firstname"),
+    ("lastname", "developer__lastname"),
+    ("role", "role"),
+    ("skills", "skills"),
+    ("github", "github"),
+    ("linkedin", "linkedin"),
+    ("website", "website"),
+    ("is_verified", "developer__is_verified"),
+    ("created_at", "developer__created_at"),
+)
+
+
+def developer_export_queryset(params):
+    return apply_export_filters(
+        DeveloperProfile.objects.all(), params, date_field="developer__created_at"
+    )
@@ -0,0 +1,13 @@
+from django.contrib.auth import get_user_model
+from django_filters import rest_framework as filters
+
+User = get_user_model()
+
+
+class DeveloperFilter(filters.FilterSet):
+    role = filters.CharFilter(field_name="developerprofile__role")
+    verified = filters.BooleanFilter(field_name="is_verified")
+
+    class Meta:
+        model = User
+        fields = ("role", "verified")
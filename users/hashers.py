@@ -0,0 +1,46 @@
+"""
+Password hashing tiers and off-thread hashing
+
+settings.PASSWORD_HASHER picks the tier whose first hasher encodes new
+passwords; hashes from the other hashers still verify and are upgraded on
+the next successful login. Async views run the CPU-bound work in a bounded
+thread pool so the event loop keeps serving other requests; the argon2 and
+hashlib implementations release the GIL while hashing.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+
+_pool = None
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with parameters from settings (ARGON2_TIME_COST,
+    ARGON2_MEMORY_COST in KiB, ARGON2_PARALLELISM). Hashes made with other
+    parameters are rehashed on login.
+    """
+
+    time_cost = settings.ARGON2_TIME_COST
+    memory_cost = settings.ARGON2_MEMORY_COST
+    parallelism = settings.ARGON2_PARALLELISM
+
+
+def hashing_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASHING_THREADS,
+            thread_name_prefix="password-hashing",
+        )
+    return _pool
+
+
+async def offload(func, *args):
+    """
+    Run a hashing call in the bounded pool, excess calls queue there
+    """
+    return await asyncio.get_running_loop().run_in_executor(hashing_pool(), func, *args)
@@ -0,0 +1,158 @@
+"""
+Profile image variants
+
+Fixed size JPEG variants are rendered with Pillow once per uploaded image
+and stored next to the original as <public_id>_<variant>. Their stored
+values are kept in User.image_variants, so responses build variant URLs
+without calling the storage API.
+"""
+
+import io
+import logging
+
+from cloudinary.models import CloudinaryField
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from users.cache import invalidate_user
+from users.uploads import get_upload_backend
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# name: (box, crop to fill the box)
+IMAGE_VARIANTS = {
+    "thumbnail": ((96, 96), True),
+    "medium": ((480, 480), False),
+}
+JPEG_QUALITY = 85
+
+
+def validate_image_file(source) -> None:
+    """
+    Raise ValidationError unless Pillow can read source as an image
+    """
+    try:
+        with Image.open(source) as image:
+            image.verify()
+    except Exception:
+        # like Django's ImageField, any failure to parse means "not an image"
+        raise serializers.ValidationError(
+            "Upload a valid image. The file you uploaded was either not an "
+            "image or a corrupted image.",
+            code="invalid_image",
+        )
+    finally:
+        source.seek(0)
+
+
+def render_variants(source) -> dict:
+    """
+    {name: JPEG bytes} for each of IMAGE_VARIANTS
+    """
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    variants = {}
+    for name, (box, crop) in IMAGE_VARIANTS.items():
+        if crop:
+            variant = ImageOps.fit(image, box, Image.LANCZOS)
+        else:
+            variant = image.copy()
+            variant.thumbnail(box, Image.LANCZOS)
+        buffer = io.BytesIO()
+        variant.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        variants[name] = buffer.getvalue()
+    return variants
+
+
+def save_variants(user, rendered: dict) -> dict:
+    """
+    Store rendered {name: JPEG bytes} next to user.image
+    """
+    backend = get_upload_backend()
+    variants = {
+        name: backend.store(
+            f"{user.image.public_id}_{name}", io.BytesIO(content), "jpg"
+        )
+        for name, content in rendered.items()
+    }
+    User.objects.filter(pk=user.pk).update(image_variants=variants)
+    user.image_variants = variants
+    invalidate_user(user.pk)
+    return variants
+
+
+def store_variants(user, source=None) -> dict:
+    """
+    Render and store the variants of user.image,
+    reading the original from the storage unless source is given
+    """
+    if source is None:
+        source = get_upload_backend().open(user.image)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+    return save_variants(user, render_variants(source))
+
+
+def store_variants_on_commit(user, source) -> None:
+    """
+    Render the variants now, while the upload is open, and store them once
+    the current transaction commits so storage calls never hold it open.
+    Failures are left to generate_image_variants.
+    """
+    try:
+        source.seek(0)
+        rendered = render_variants(source)
+    except Exception as e:
+        logger.warning("image variants for %s failed: %r", user.pk, e)
+        return
+
+    def store():
+        try:
+            save_variants(user, rendered)
+        except Exception as e:
+            logger.warning("image variants for %s failed: %r", user.pk, e)
+
+    transaction.on_commit(store)
+
+
+def generate_missing_variants(limit=None) -> tuple:
+    """
+    Variants for images recorded without them (direct uploads, older
+    accounts), returns (generated, failed)
+    """
+    users = (
+        User.objects.exclude(image__isnull=True)
+        .exclude(image="")
+        .filter(image_variants={})
+        .only("id", "image")
+    )
+    if limit:
+        users = users[:limit]
+    generated = failed = 0
+    for user in users.iterator():
+        try:
+            store_variants(user)
+        except Exception as e:
+            logger.warning("image variants for %s failed: %r", user.pk, e)
+            failed += 1
+        else:
+            generated += 1
+    return generated, failed
+
+
+_image_field = CloudinaryField()
+
+
+def variant_url(user, name: str):
+    """
+    URL of the named variant, the original until variants exist
+    """
+    value = (user.image_variants or {}).get(name)
+    resource = _image_field.to_python(value) if value else user.image
+    if not resource:
+        return None
+    return get_upload_backend().url(resource)
@@ -0,0 +1,53 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+from django.core.management.base import BaseCommand, CommandError
+
+from users.hashers import TunedArgon2PasswordHasher
+
+CONFIGURATIONS = {
+    "pbkdf2": PBKDF2PasswordHasher,
+    "argon2": TunedArgon2PasswordHasher,
+    "argon2-django-default": Argon2PasswordHasher,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password verifications (the cost of a login) per second "
+        "and per core for each hasher configuration"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hasher", choices=list(CONFIGURATIONS), action="append", dest="hashers"
+        )
+        parser.add_argument("--logins", type=int, default=50)
+        parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        cores = min(options["threads"], os.cpu_count() or 1)
+        for name in options["hashers"] or CONFIGURATIONS:
+            hasher = CONFIGURATIONS[name]()
+            encoded = hasher.encode("correct horse battery", hasher.salt())
+
+            def login(_):
+                return hasher.verify("correct horse battery", encoded)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+                if not all(pool.map(login, range(options["logins"]))):
+                    raise CommandError(f"{name} failed to verify its own hash")
+            elapsed = time.perf_counter() - started
+
+            rate = options["logins"] / elapsed
+            self.stdout.write(
+                f"{name}: {rate:.1f} logins/s with {options['threads']} threads, "
+                f"{rate / cores:.1f} logins/s per core, "
+                f"{elapsed / options['logins'] * 1000 * cores:.1f} ms per login"
+            )
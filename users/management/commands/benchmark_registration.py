@@ -0,0 +1,61 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from users.views import DeveloperRegister, UserRegister
+
+VIEWS = {
+    "client": UserRegister.as_view(),
+    "developer": DeveloperRegister.as_view(),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Register --count clients and developers through the API views "
+        "in a rolled back transaction, reporting queries per registration "
+        "and registrations per second"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        count = options["count"]
+        for name, view in VIEWS.items():
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    for _ in range(count):
+                        key = uuid.uuid4().hex[:12]
+                        request = factory.post(
+                            "/",
+                            {
+                                "username": f"bench{key}",
+                                "email": f"bench{key}@example.com",
+                                "password": "Bench1!pass",
+                            },
+                            format="json",
+                        )
+                        response = view(request)
+                        if response.status_code != 201:
+                            raise CommandError(response.data)
+                    elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+
+            # the rolled back outer transaction turns each registration's own
+            # transaction into a savepoint, those statements are left out
+            statements = [
+                query
+                for query in queries
+                if not query["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))
+            ]
+            self.stdout.write(
+                f"{name}: {len(statements) / count:.1f} queries per registration, "
+                f"{count / elapsed:.1f} registrations/s"
+            )
@@ -0,0 +1,8 @@
+from hireadeveloper.exports import ExportCommand
+from users.exports import DEVELOPER_COLUMNS, developer_export_queryset
+
+
+class Command(ExportCommand):
+    help = "Export developer profiles as NDJSON or CSV"
+    columns = DEVELOPER_COLUMNS
+    queryset_factory = developer_export_queryset
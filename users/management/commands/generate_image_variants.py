@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from users.images import generate_missing_variants
+
+
+class Command(BaseCommand):
+    help = (
+        "Render thumbnail/medium variants for profile images recorded without "
+        "them (direct uploads, images from before variants existed)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int)
+
+    def handle(self, *args, **options):
+        generated, failed = generate_missing_variants(options["limit"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Generated variants for {generated} images")
+        )
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} images failed"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.chunked import prune_chunked_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete chunked uploads untouched for CHUNKED_UPLOAD_EXPIRY and their temp files"
+
+    def handle(self, *args, **options):
+        deleted = prune_chunked_uploads()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} chunked uploads"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from users.revocation import (
+    PRUNE_CHUNK_SIZE,
+    prune_legacy_blacklist,
+    prune_revoked_tokens,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired revoked tokens in chunks, "
+        "--legacy also clears the old simplejwt blacklist tables"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=PRUNE_CHUNK_SIZE)
+        parser.add_argument("--legacy", action="store_true")
+
+    def handle(self, *args, **options):
+        deleted = prune_revoked_tokens(options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} revoked tokens"))
+        if options["legacy"]:
+            deleted = prune_legacy_blacklist(options["chunk_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Pruned {deleted} legacy blacklist rows")
+            )
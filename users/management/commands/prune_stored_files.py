@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from users.uploads import STORED_FILE_GRACE, prune_stored_files
+
+
+class Command(BaseCommand):
+    help = "Delete stored uploads no file field has referenced for --grace-hours"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=STORED_FILE_GRACE.total_seconds() / 3600,
+        )
+        parser.add_argument("--limit", type=int, default=None)
+
+    def handle(self, *args, **options):
+        deleted = prune_stored_files(
+            timedelta(hours=options["grace_hours"]), options["limit"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} stored files"))
@@ -0,0 +1,43 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import BATCH_SIZE, MAX_ATTEMPTS, drain_outbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued outbox email in batches over one connection, "
+        "once or every --interval seconds with --loop"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+        parser.add_argument("--loop", action="store_true")
+        parser.add_argument("--interval", type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                outcome = drain_outbox(options["batch_size"], options["max_attempts"])
+            except Exception:
+                if not options["loop"]:
+                    raise
+                # keep the worker alive, e.g. through a database restart
+                logger.exception("draining the outbox failed")
+                outcome = None
+            if outcome or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Sent {outcome['Sent']}, "
+                        f"retrying {outcome['Pending']}, failed {outcome['Failed']}, "
+                        f"deferred {outcome['Deferred']}"
+                    )
+                )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0006_alter_developerprofile_role"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="developerprofile",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AddField(
+            model_name="developerprofile",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
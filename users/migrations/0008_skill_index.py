@@ -0,0 +1,63 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:36
+
+import re
+
+from django.db import migrations, models
+
+
+def parse_skills(text) -> list:
+    """
+    Frozen copy of users.models.parse_skills as of this migration
+    """
+    if not text:
+        return []
+    names = []
+    for part in re.split(r"[,;\n]", text):
+        name = " ".join(part.split()).lower()[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def index_existing_skills(apps, schema_editor):
+    DeveloperProfile = apps.get_model("users", "DeveloperProfile")
+    Skill = apps.get_model("users", "Skill")
+    for profile in DeveloperProfile.objects.exclude(skills__isnull=True).iterator():
+        names = parse_skills(profile.skills)
+        Skill.objects.bulk_create(
+            [Skill(name=name) for name in names], ignore_conflicts=True
+        )
+        profile.skill_set.set(Skill.objects.filter(name__in=names))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_developerprofile_timestamps"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Skill",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="developerprofile",
+            name="skill_set",
+            field=models.ManyToManyField(
+                blank=True, related_name="developers", to="users.skill"
+            ),
+        ),
+        migrations.RunPython(index_existing_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0008_skill_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="developerprofile",
+            index=models.Index(fields=["role"], name="developerprofile_role_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_developer", True)),
+                fields=["is_verified", "-created_at"],
+                name="developer_recent_idx",
+            ),
+        ),
+    ]
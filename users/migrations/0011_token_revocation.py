@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0010_outgoing_email"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RevokedToken",
+            fields=[
+                (
+                    "jti",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="token_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
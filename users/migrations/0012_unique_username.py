@@ -0,0 +1,43 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+def rename_duplicate_usernames(apps, schema_editor):
+    """
+    Usernames were only unique through the API serializers, accounts created
+    elsewhere (admin, createsuperuser) may share one. The earliest account
+    keeps it, later ones get their id appended.
+    """
+    User = apps.get_model("users", "User")
+    seen = set()
+    for user_id, username in (
+        User.objects.order_by("created_at").values_list("id", "username").iterator()
+    ):
+        if username in seen:
+            User.objects.filter(id=user_id).update(
+                username=f"{username[:117]}-{user_id.hex}"
+            )
+        else:
+            seen.add(username)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0011_token_revocation"),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_usernames, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="user",
+            name="username",
+            field=models.CharField(
+                help_text="Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only.",
+                max_length=150,
+                unique=True,
+                verbose_name="username",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0012_unique_username"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0013_user_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StoredFile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("sha256", models.CharField(max_length=64)),
+                ("value", models.CharField(max_length=255, unique=True)),
+                ("size", models.PositiveBigIntegerField(default=0)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="stored_files",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("ref_count", 0)),
+                        fields=["updated_at"],
+                        name="stored_file_unreferenced_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="storedfile",
+            constraint=models.UniqueConstraint(
+                fields=("owner", "sha256"), name="unique_stored_file"
+            ),
+        ),
+    ]
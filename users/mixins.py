@@ -0,0 +1,53 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+class ConditionalRetrieveMixin:
+    """
+    Weak ETag and Last-Modified headers for retrieve views.
+    The validators come from a cheap values query, so a 304 is returned
+    without loading or serializing the object.
+    Only use on views whose get_queryset already scopes what the user may see,
+    object permissions are not checked for 304 responses.
+    """
+
+    def get_lookup_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    def get_modified_state(self, queryset):
+        """
+        Returns the object's version values from the lookup queryset,
+        most recent modification first, or None when the object doesn't exist
+        """
+        return queryset.values_list("updated_at").first()
+
+    def get_etag(self, state) -> str:
+        # the representation also depends on ?fields= / ?expand=
+        version = f"{state}|{self.request.META.get('QUERY_STRING', '')}"
+        return 'W/"%s"' % hashlib.md5(version.encode()).hexdigest()
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            queryset = self.get_lookup_queryset()
+        except (TypeError, ValueError, ValidationError):
+            # malformed lookup value, let retrieve() raise the 404
+            return super().retrieve(request, *args, **kwargs)
+        state = self.get_modified_state(queryset)
+        if state is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = self.get_etag(state)
+        last_modified = int(state[0].timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
@@ -1,3 +1,7 @@
+import os
+import re
+
+from django.conf import settings
 from django.db import models
 from django.db import models
 from django.contrib.auth.models import (
@@ -5,17 +9,30 @@ from django.contrib.auth.models import (
     BaseUserManager,
     PermissionsMixin,
 )
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from cloudinary.models import CloudinaryField
-from users.abstracts import TimeStampedModel, UniversalIdModel, AbstractProfile
+from users.abstracts import (
+    TimeStampedModel,
+    UniversalIdModel,
+    AbstractProfile,
+    StoredFilesMixin,
+)
+from users.cache import invalidate_user
 
 
 class UserManager(BaseUserManager):
     use_in_migrations: True
 
-    def _create_user(self, username: str, email: str, password: str, **kwargs):
+    def _create_user(
+        self, username: str, email: str, password: str, password_hash=None, **kwargs
+    ):
         """
         Create and save a user with the given username, email, and password.
+        password_hash is an already encoded password (see users.hashers.offload)
+        and skips hashing on the calling thread.
         """
         if not username:
             raise ValueError("The given username must be set")
@@ -23,7 +40,10 @@ class UserManager(BaseUserManager):
             raise ValueError("The given email must be set")
         email = self.normalize_email(email)
         user = self.model(username=username, email=email, **kwargs)
-        user.set_password(password)
+        if password_hash is None:
+            user.set_password(password)
+        else:
+            user.password = password_hash
         user.save()
         return user
 
@@ -64,6 +84,7 @@ class UserManager(BaseUserManager):
 
 
 class User(
+    StoredFilesMixin,
     AbstractBaseUser,
     PermissionsMixin,
     TimeStampedModel,
@@ -80,6 +101,7 @@ class User(
     username = models.CharField(
         _("username"),
         max_length=150,
+        unique=True,
         help_text=_(
             "Required. 150 characters or fewer. Letters, digits and @/./+/-/_ only."
         ),
@@ -97,8 +119,11 @@ class User(
     is_admin = models.BooleanField(default=False)
     is_user = models.BooleanField(default=True)
     is_developer = models.BooleanField(default=False)
+    # stamped into issued JWTs, bumping it revokes all of them
+    token_version = models.PositiveIntegerField(default=0, editable=False)
 
     objects = UserManager()
+    file_fields = ("image",)
     REQUIRED_FIELDS = ["username", "password"]
     USERNAME_FIELD = "email"
 
@@ -106,12 +131,66 @@ class User(
         ordering = [
             "-created_at",
         ]
+        indexes = [
+            # developer directory, optionally filtered by ?verified=
+            models.Index(
+                fields=["is_verified", "-created_at"],
+                name="developer_recent_idx",
+                condition=models.Q(is_developer=True),
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.username
 
 
-class DeveloperProfile(UniversalIdModel):
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_cache_invalidate(sender, instance, **kwargs) -> None:
+    invalidate_user(instance.pk)
+
+
+def parse_skills(text) -> list:
+    """
+    "Python, Django;  REST apis" -> ["python", "django", "rest apis"]
+    """
+    if not text:
+        return []
+    names = []
+    for part in re.split(r"[,;\n]", text):
+        name = " ".join(part.split()).lower()[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def match_skills(developers, text):
+    """
+    Narrow a developer (User) queryset to those with any of the skills in text,
+    best overlap first. Matches go through the indexed skill table.
+    """
+    names = parse_skills(text)
+    if not names:
+        return developers
+    return (
+        developers.filter(developerprofile__skill_set__name__in=names)
+        .annotate(skill_matches=models.Count("developerprofile__skill_set"))
+        .order_by("-skill_matches", "-created_at")
+    )
+
+
+class Skill(models.Model):
+    """
+    Normalized skill names, parsed from DeveloperProfile.skills
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class DeveloperProfile(StoredFilesMixin, UniversalIdModel, TimeStampedModel):
     """
     Developers Model:
     add resume
@@ -128,6 +207,201 @@ class DeveloperProfile(UniversalIdModel):
     linkedin = models.URLField(blank=True, null=True)
     website = models.URLField(blank=True, null=True)
     role = models.CharField(max_length=255, blank=True, null=True)
+    # index of the free-text skills, kept in sync by sync_skills()
+    skill_set = models.ManyToManyField(Skill, blank=True, related_name="developers")
+
+    file_fields = ("resume",)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["role"], name="developerprofile_role_idx"),
+        ]
+
+    def sync_skills(self) -> None:
+        names = parse_skills(self.skills)
+        Skill.objects.bulk_create(
+            [Skill(name=name) for name in names], ignore_conflicts=True
+        )
+        self.skill_set.set(Skill.objects.filter(name__in=names))
 
     def __str__(self) -> str:
         return self.developer.username
+
+
+class OutgoingEmail(UniversalIdModel, TimeStampedModel):
+    """
+    Mail queued in the request's transaction, sent later by
+    the send_outbox worker (see users.outbox)
+    """
+
+    EMAIL_STATUS = (
+        ("Pending", "Pending"),
+        ("Sent", "Sent"),
+        ("Failed", "Failed"),
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, blank=True, default="")
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=EMAIL_STATUS, default="Pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = [
+            "created_at",
+        ]
+        indexes = [
+            # the worker's queue: due Pending mail, oldest first
+            models.Index(
+                fields=["next_attempt_at", "created_at"],
+                name="outgoing_email_due_idx",
+                condition=models.Q(status="Pending"),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.subject} - {', '.join(self.to)}"
+
+
+class RevokedToken(models.Model):
+    """
+    Refresh tokens revoked by logout or rotation,
+    kept only until they expire (see prune_revoked_tokens)
+    """
+
+    jti = models.CharField(primary_key=True, max_length=255)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self) -> str:
+        return self.jti
+
+
+class StoredFile(TimeStampedModel):
+    """
+    One stored copy of each distinct file (by SHA-256) an owner uploaded,
+    referenced by ref_count file fields (see users.uploads)
+    """
+
+    owner = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="stored_files"
+    )
+    sha256 = models.CharField(max_length=64)
+    # the value file fields store, e.g. "raw/upload/v1/resumes/<owner>/<sha256>"
+    value = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "sha256"], name="unique_stored_file"
+            ),
+        ]
+        indexes = [
+            # prune_stored_files' queue: unreferenced files, oldest first
+            models.Index(
+                fields=["updated_at"],
+                name="stored_file_unreferenced_idx",
+                condition=models.Q(ref_count=0),
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.value
+
+
+class ChunkedUpload(UniversalIdModel, TimeStampedModel):
+    """
+    A resumable upload, its chunks are assembled
+    in a temp file until finalized (see users.chunked)
+    """
+
+    owner = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="chunked_uploads"
+    )
+    kind = models.CharField(max_length=20)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    # bytes received so far, the next chunk starts here
+    offset = models.PositiveBigIntegerField(default=0)
+    # the stored file's value once finalized
+    value = models.CharField(max_length=255, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            # expiry and prune_chunked_uploads
+            models.Index(fields=["updated_at"], name="chunked_upload_updated_idx"),
+        ]
+
+    @property
+    def path(self) -> str:
+        return os.path.join(settings.CHUNKED_UPLOAD_ROOT, f"{self.pk.hex}.part")
+
+    def __str__(self) -> str:
+        return self.filename
+
+
+@receiver(post_delete, sender=ChunkedUpload)
+def chunked_upload_post_delete(sender, instance, **kwargs) -> None:
+    try:
+        os.remove(instance.path)
+    except FileNotFoundError:
+        pass
+
+
+def adjust_file_references(changes: dict) -> None:
+    """
+    Atomically apply {stored value: delta} to StoredFile reference counts,
+    values that were not stored through StoredFile are ignored
+    """
+    for value, delta in changes.items():
+        if not value or not delta:
+            continue
+        files = StoredFile.objects.filter(value=value)
+        if delta < 0:
+            files = files.filter(ref_count__gte=-delta)
+        files.update(ref_count=models.F("ref_count") + delta, updated_at=timezone.now())
+
+
+def update_file_references(instance, created: bool) -> None:
+    previous = {} if created else instance._stored_files or {}
+    current = instance.current_files()
+    changes = {}
+    for name, value in current.items():
+        old = previous.get(name)
+        if old != value:
+            changes[value] = changes.get(value, 0) + 1
+            changes[old] = changes.get(old, 0) - 1
+    adjust_file_references(changes)
+    instance._stored_files = {**previous, **current}
+
+
+def release_file_references(instance) -> None:
+    stored = instance._stored_files
+    if stored is None:
+        stored = instance.current_files()
+    changes = {}
+    for value in stored.values():
+        changes[value] = changes.get(value, 0) - 1
+    adjust_file_references(changes)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=DeveloperProfile)
+def file_references_post_save(sender, instance, created, **kwargs) -> None:
+    update_file_references(instance, created)
+
+
+@receiver(pre_delete, sender=User)
+@receiver(pre_delete, sender=DeveloperProfile)
+def file_references_pre_delete(sender, instance, **kwargs) -> None:
+    instance.load_stored_files()
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=DeveloperProfile)
+def file_references_post_delete(sender, instance, **kwargs) -> None:
+    release_file_references(instance)
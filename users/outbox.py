@@ -0,0 +1,156 @@
+"""
+Transactional email outbox
+
+queue_email() stores the message in the caller's transaction, so mail only
+goes out for writes that commit and requests never wait on the mail server.
+drain_outbox() sends due mail in batches over one reused connection, opened
+only once there is mail to send. Failed messages are retried with
+exponential backoff up to MAX_ATTEMPTS; while the mail server is
+unreachable claimed mail is put back without spending an attempt.
+"""
+
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=1)
+MAX_RETRY_DELAY = timedelta(hours=6)
+# a claimed batch is hidden from other workers for this long,
+# if the worker dies mid-batch the mail becomes due again
+LEASE = timedelta(minutes=5)
+
+
+def queue_email(subject: str, body: str, to, from_email: str = "") -> OutgoingEmail:
+    return OutgoingEmail.objects.create(
+        subject=subject, body=body, from_email=from_email, to=list(to)
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def claim_batch(batch_size: int) -> list:
+    """
+    Lease a batch of due Pending mail,
+    concurrent workers skip rows another worker has locked
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="Pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "created_at")[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + LEASE
+        )
+    return emails
+
+
+def reopen(connection) -> None:
+    # an SMTP session may be unusable after an error, start a fresh one
+    connection.close()
+    try:
+        connection.open()
+    except OSError:
+        # (smtplib errors are OSErrors too)
+        # the next send reports the error against its own message
+        pass
+
+
+def defer(emails, error) -> None:
+    """
+    Put claimed mail back, due after RETRY_DELAY, without counting an attempt
+    """
+    now = timezone.now()
+    OutgoingEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+        next_attempt_at=now + RETRY_DELAY, last_error=repr(error), updated_at=now
+    )
+
+
+def send_batch(
+    connection, batch_size: int = BATCH_SIZE, max_attempts: int = MAX_ATTEMPTS
+):
+    """
+    Send one claimed batch, returns a Counter of the resulting statuses,
+    "Deferred" counts mail put back because the server was unreachable
+    """
+    emails = claim_batch(batch_size)
+    outcome = Counter()
+    if not emails:
+        return outcome
+    try:
+        # a no-op when the connection is already open
+        connection.open()
+    except OSError as e:
+        logger.warning("mail server unavailable: %r", e)
+        defer(emails, e)
+        outcome["Deferred"] = len(emails)
+        return outcome
+
+    for email in emails:
+        email.attempts += 1
+        message = EmailMessage(
+            email.subject,
+            email.body,
+            email.from_email or None,
+            email.to,
+            connection=connection,
+        )
+        try:
+            connection.send_messages([message])
+        except Exception as e:
+            logger.warning("sending %s failed: %r", email.pk, e)
+            email.last_error = repr(e)
+            if email.attempts >= max_attempts:
+                email.status = "Failed"
+            else:
+                email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+            reopen(connection)
+        else:
+            email.status = "Sent"
+            email.sent_at = timezone.now()
+            email.last_error = ""
+        email.updated_at = timezone.now()
+        outcome[email.status] += 1
+
+    OutgoingEmail.objects.bulk_update(
+        emails,
+        [
+            "status",
+            "attempts",
+            "next_attempt_at",
+            "last_error",
+            "sent_at",
+            "updated_at",
+        ],
+    )
+    return outcome
+
+
+def drain_outbox(batch_size: int = BATCH_SIZE, max_attempts: int = MAX_ATTEMPTS):
+    """
+    Send everything currently due over a single connection,
+    stops early while the mail server is unreachable
+    """
+    total = Counter()
+    connection = get_connection()
+    try:
+        while True:
+            outcome = send_batch(connection, batch_size, max_attempts)
+            total.update(outcome)
+            if outcome["Deferred"] or sum(outcome.values()) < batch_size:
+                return total
+    finally:
+        connection.close()
@@ -15,7 +15,7 @@ class IsDeveloper(permissions.BasePermission):
         return bool(request.user.is_developer)
 
     def has_object_permission(self, request, view, obj):
-        return bool(obj.developer == request.user)
+        return bool(obj.developer_id == request.user.pk)
 
 
 class IsClient(permissions.BasePermission):
@@ -23,7 +23,7 @@ class IsClient(permissions.BasePermission):
         return bool(request.user.is_client)
 
     def has_object_permission(self, request, view, obj):
-        return bool(obj.client == request.user)
+        return bool(obj.client_id == request.user.pk)
 
 
 class IsDeveloperOrReadOnly(permissions.BasePermission):
@@ -0,0 +1,134 @@
+"""
+JWT revocation without the simplejwt blacklist tables
+
+Issued tokens carry the user's token_version, bumping User.token_version
+revokes every token of that user at once. Single refresh tokens revoked by
+logout or rotation are kept in RevokedToken only until they expire, so
+both checks are one primary key lookup and the table stays small.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from users.cache import invalidate_user
+from users.models import RevokedToken
+
+User = get_user_model()
+
+VERSION_CLAIM = "token_version"
+PRUNE_CHUNK_SIZE = 1000
+
+
+class VersionedRefreshToken(RefreshToken):
+    """
+    Refresh token stamped with the user's token_version,
+    the access tokens it issues copy the claim
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+    def verify(self):
+        super().verify()
+        if RevokedToken.objects.filter(pk=self[api_settings.JTI_CLAIM]).exists():
+            raise TokenError("Token is revoked")
+        current = (
+            User.objects.filter(
+                **{api_settings.USER_ID_FIELD: self.get(api_settings.USER_ID_CLAIM)}
+            )
+            .values_list("token_version", flat=True)
+            .first()
+        )
+        # tokens issued before versioning carry no claim and count as version 0
+        if current is None or self.get(VERSION_CLAIM, 0) != current:
+            raise TokenError("Token is revoked")
+
+    def revoke(self) -> None:
+        RevokedToken.objects.get_or_create(
+            pk=self[api_settings.JTI_CLAIM],
+            defaults={"expires_at": datetime_from_epoch(self["exp"])},
+        )
+
+    # TokenRefreshSerializer calls blacklist() when BLACKLIST_AFTER_ROTATION is on
+    blacklist = revoke
+
+
+def revoke_user_tokens(user_id) -> None:
+    """
+    Revoke every access and refresh token issued to the user
+    """
+    User.objects.filter(pk=user_id).update(token_version=F("token_version") + 1)
+    invalidate_user(user_id)
+
+
+def delete_in_chunks(queryset, chunk_size: int) -> int:
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list("pk", flat=True)[:chunk_size])
+        if not pks:
+            return deleted
+        deleted += queryset.model.objects.filter(pk__in=pks).delete()[0]
+
+
+def prune_revoked_tokens(chunk_size: int = PRUNE_CHUNK_SIZE) -> int:
+    return delete_in_chunks(
+        RevokedToken.objects.filter(expires_at__lt=timezone.now()), chunk_size
+    )
+
+
+LEGACY_BLACKLIST_PRUNE = (
+    # blacklist rows first, they reference the outstanding tokens
+    (
+        "token_blacklist_blacklistedtoken",
+        """
+        DELETE FROM token_blacklist_blacklistedtoken WHERE id IN (
+            SELECT b.id FROM token_blacklist_blacklistedtoken b
+            JOIN token_blacklist_outstandingtoken o ON o.id = b.token_id
+            WHERE o.expires_at < %s LIMIT %s
+        )
+        """,
+    ),
+    (
+        "token_blacklist_outstandingtoken",
+        """
+        DELETE FROM token_blacklist_outstandingtoken WHERE id IN (
+            SELECT o.id FROM token_blacklist_outstandingtoken o
+            WHERE o.expires_at < %s AND NOT EXISTS (
+                SELECT 1 FROM token_blacklist_blacklistedtoken b
+                WHERE b.token_id = o.id
+            )
+            LIMIT %s
+        )
+        """,
+    ),
+)
+
+
+def prune_legacy_blacklist(chunk_size: int = PRUNE_CHUNK_SIZE) -> int:
+    """
+    Delete expired rows left in the tables of the retired
+    rest_framework_simplejwt.token_blacklist app
+    """
+    tables = set(connection.introspection.table_names())
+    now = timezone.now()
+    deleted = 0
+    for table, sql in LEGACY_BLACKLIST_PRUNE:
+        if table not in tables:
+            continue
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [now, chunk_size])
+                count = cursor.rowcount
+            deleted += count
+            if count < chunk_size:
+                break
+    return deleted
@@ -1,14 +1,37 @@
+import os
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import TokenError
 from django.contrib.sites.shortcuts import get_current_site
-from django.core.mail import send_mail
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.template.loader import render_to_string
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 
-from users.models import DeveloperProfile
+from users.chunked import CHUNKED_KINDS, active_uploads
+from users.models import ChunkedUpload, DeveloperProfile
+from users.outbox import queue_email
+from users.revocation import VersionedRefreshToken, revoke_user_tokens
+from users.images import (
+    IMAGE_VARIANTS,
+    store_variants_on_commit,
+    validate_image_file,
+    variant_url,
+)
+from users.uploads import (
+    SHA256_RE,
+    UPLOAD_KINDS,
+    StoreUploadsMixin,
+    UploadField,
+    absolute_url,
+)
 from users.validators import (
     validate_password_digit,
     validate_password_uppercase,
@@ -21,7 +44,64 @@ from hireadeveloper.settings.base import EMAIL_USER, DOMAIN
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UniqueUserFieldsMixin:
+    """
+    Checks username and email uniqueness in one query,
+    the unique constraints catch registrations racing past it
+    """
+
+    unique_fields = ("username", "email")
+
+    def conflicting_fields(self, attrs) -> dict:
+        values = {field: attrs[field] for field in self.unique_fields if field in attrs}
+        if not values:
+            return {}
+        query = Q()
+        for field, value in values.items():
+            query |= Q(**{field: value})
+        taken = User.objects.filter(query)
+        if self.instance is not None:
+            taken = taken.exclude(pk=self.instance.pk)
+
+        errors = {}
+        for row in taken.values(*values):
+            for field, value in values.items():
+                if row[field] == value:
+                    errors[field] = [UniqueValidator.message]
+        return errors
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        errors = self.conflicting_fields(attrs)
+        if errors:
+            raise serializers.ValidationError(errors, code="unique")
+        return attrs
+
+    def save(self, **kwargs):
+        try:
+            # a savepoint, so the taken fields can still be looked up
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
+            # a concurrent registration got past validate() first,
+            # anything else (profile insert, NOT NULL...) is not a client error
+            errors = self.conflicting_fields(self.validated_data)
+            if not errors:
+                raise
+            raise serializers.ValidationError(errors, code="unique")
+
+
+def uploaded_file(image):
+    """
+    The uploaded content behind a validated image, None for direct uploads
+    """
+    image = getattr(image, "uploaded_file", image)
+    return image if isinstance(image, UploadedFile) else None
+
+
+class UserSerializer(
+    StoreUploadsMixin, UniqueUserFieldsMixin, serializers.ModelSerializer
+):
     """
     User serializers
     creating new clients
@@ -34,12 +114,10 @@ class UserSerializer(serializers.ModelSerializer):
     username = serializers.CharField(
         max_length=20,
         min_length=4,
-        validators=[UniqueValidator(queryset=User.objects.all())],
     )
 
     email = serializers.EmailField(
         required=True,
-        validators=[UniqueValidator(queryset=User.objects.all())],
     )
 
     password = serializers.CharField(
@@ -53,7 +131,8 @@ class UserSerializer(serializers.ModelSerializer):
             validate_password_lowercase,
         ],
     )
-    image = serializers.FileField(use_url=True, required=False)
+    image = UploadField("image", required=False)
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -65,6 +144,7 @@ class UserSerializer(serializers.ModelSerializer):
             "username",
             "password",
             "image",
+            "image_variants",
             "about",
             "is_verified",
             "is_client",
@@ -76,7 +156,8 @@ class UserSerializer(serializers.ModelSerializer):
     @staticmethod
     def send_activation_email(user, request):
         """
-        send verification email
+        queue the verification email,
+        the send_outbox worker delivers it
         """
         current_site = get_current_site(request)
         email_body = render_to_string(
@@ -89,20 +170,39 @@ class UserSerializer(serializers.ModelSerializer):
             },
         )
 
-        send_mail(
-            "Activate your account",
-            email_body,
-            EMAIL_USER,
-            [user.email],
-            fail_silently=False,
-        )
+        queue_email("Activate your account", email_body, [user.email], EMAIL_USER)
+
+    def get_image_variants(self, obj):
+        return {
+            name: absolute_url(self.context, variant_url(obj, name))
+            for name in IMAGE_VARIANTS
+        }
 
+    def validate_image(self, value):
+        image = uploaded_file(value)
+        if image is not None:
+            validate_image_file(image)
+        return value
+
+    @transaction.atomic
     def create(self, validated_data):
         request = self.context.get("request")
+        validated_data["is_client"] = True
+        image = uploaded_file(validated_data.get("image"))
         user = User.objects.create_user(**validated_data)
-        user.is_client = True
-        user.save()
         self.send_activation_email(user, request)
+        if image is not None:
+            store_variants_on_commit(user, image)
+        return user
+
+    def update(self, instance, validated_data):
+        image = uploaded_file(validated_data.get("image"))
+        if "image" in validated_data:
+            # rendered from the new image below, or later by generate_image_variants
+            validated_data["image_variants"] = {}
+        user = super().update(instance, validated_data)
+        if image is not None:
+            store_variants_on_commit(user, image)
         return user
 
 
@@ -136,7 +236,7 @@ class VerifyEmailSerializer(serializers.Serializer):
         return user
 
 
-class DeveloperSerializer(serializers.ModelSerializer):
+class DeveloperSerializer(UniqueUserFieldsMixin, serializers.ModelSerializer):
     """
     Developer Serializer
     Creating developer account
@@ -146,12 +246,10 @@ class DeveloperSerializer(serializers.ModelSerializer):
     username = serializers.CharField(
         max_length=20,
         min_length=4,
-        validators=[UniqueValidator(queryset=User.objects.all())],
     )
 
     email = serializers.EmailField(
         required=True,
-        validators=[UniqueValidator(queryset=User.objects.all())],
     )
 
     password = serializers.CharField(
@@ -165,6 +263,7 @@ class DeveloperSerializer(serializers.ModelSerializer):
             validate_password_lowercase,
         ],
     )
+    thumbnail = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -177,23 +276,27 @@ class DeveloperSerializer(serializers.ModelSerializer):
             "password",
             "created_at",
             "is_verified",
+            "thumbnail",
         )
 
+    def get_thumbnail(self, obj):
+        return absolute_url(self.context, variant_url(obj, "thumbnail"))
+
+    @transaction.atomic
     def create(self, validated_data):
+        validated_data["is_developer"] = True
         developer = User.objects.create_user(**validated_data)
-        developer.is_developer = True
-        developer.save()
         DeveloperProfile.objects.create(developer=developer)
         return developer
 
 
-class DeveloperProfileSerializer(serializers.ModelSerializer):
+class DeveloperProfileSerializer(StoreUploadsMixin, serializers.ModelSerializer):
     """
     Dveloper profile serializer
     """
 
     developer = serializers.CharField(read_only=True, source="developer.username")
-    resume = serializers.FileField(use_url=True, required=False)
+    resume = UploadField("resume", required=False)
     role = serializers.CharField(min_length=2, allow_blank=True, required=False)
     skills = serializers.CharField(min_length=1, allow_blank=True, required=False)
     github = serializers.URLField(allow_blank=True, required=False)
@@ -226,11 +329,15 @@ class DeveloperProfileSerializer(serializers.ModelSerializer):
         instance.instagram = validated_data.get("instagram", instance.instagram)
         instance.website = validated_data.get("website", instance.website)
         instance.save()
+        if "skills" in validated_data:
+            instance.sync_skills()
         return instance
 
 
 class LogoutSerializer(serializers.Serializer):
     refresh = serializers.CharField()
+    # also revoke the user's tokens on every other device
+    everywhere = serializers.BooleanField(default=False)
 
     def validate(self, attrs):  # type:ignore[no-untyped-def]
         self.token = attrs["refresh"]
@@ -238,9 +345,61 @@ class LogoutSerializer(serializers.Serializer):
 
     def save(self, **kwargs):  # type:ignore[no-untyped-def]
         try:
-            RefreshToken(self.token).blacklist()
+            token = VersionedRefreshToken(self.token)
+            token.revoke()
 
         except TokenError:
             raise serializers.ValidationError(
                 "Invalid or expired token", code="invalid_token"
             )
+
+        if self.validated_data["everywhere"]:
+            revoke_user_tokens(token[api_settings.USER_ID_CLAIM])
+
+
+class TokenObtainSerializer(jwt_serializers.TokenObtainPairSerializer):
+    token_class = VersionedRefreshToken
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = VersionedRefreshToken
+
+
+class UploadSignSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=list(UPLOAD_KINDS))
+    # hex SHA-256 of the file, lets already stored content skip the upload
+    sha256 = serializers.RegexField(SHA256_RE, required=False)
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    kind = serializers.ChoiceField(choices=CHUNKED_KINDS)
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChunkedUpload
+        fields = ["id", "kind", "filename", "size", "offset", "chunk_size"]
+        read_only_fields = ["offset"]
+
+    def get_chunk_size(self, obj) -> int:
+        return settings.UPLOAD_CHUNK_SIZE
+
+    def validate_filename(self, value):
+        return os.path.basename(value.replace("\\", "/"))
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Files are limited to {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes."
+            )
+        return value
+
+    def validate(self, attrs):
+        # each open upload may reserve CHUNKED_UPLOAD_MAX_SIZE of temp space
+        user = self.context["request"].user
+        limit = settings.CHUNKED_UPLOADS_PER_USER
+        if active_uploads(user).filter(value="").count() >= limit:
+            raise serializers.ValidationError(
+                f"Finish one of your {limit} open uploads first.",
+                code="too_many_uploads",
+            )
+        return attrs
@@ -1,3 +1,769 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail, signing
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from users import chunked
+from users.models import (
+    ChunkedUpload,
+    DeveloperProfile,
+    RevokedToken,
+    Skill,
+    StoredFile,
+    parse_skills,
+)
+from users.outbox import drain_outbox, queue_email
+from users.cache import user_cache_key
+from users.revocation import (
+    VersionedRefreshToken,
+    prune_revoked_tokens,
+    revoke_user_tokens,
+)
+from users.serializers import UniqueUserFieldsMixin
+from users.uploads import CloudinaryUploadBackend, prune_stored_files
+
+User = get_user_model()
+
+
+class UserTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            "client", "client@example.com", "Passw0rd!", is_client=True
+        )
+
+    def api(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+
+class LocalUploadsMixin:
+    """
+    Files go to a throwaway LOCAL_UPLOAD_ROOT through LocalUploadBackend
+    """
+
+    def setUp(self):
+        super().setUp()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        overrides = override_settings(
+            UPLOAD_BACKEND="users.uploads.LocalUploadBackend",
+            LOCAL_UPLOAD_ROOT=root,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+
+def png_file(name="avatar.png", size=(320, 240)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "teal").save(buffer, "PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class ProfileImageTests(LocalUploadsMixin, UserTestCase):
+    def patch_image(self, image):
+        return self.api(self.user).patch(
+            f"/v1/users/profile/{self.user.pk}/", {"image": image}, format="multipart"
+        )
+
+    def test_non_image_is_rejected(self):
+        response = self.patch_image(
+            SimpleUploadedFile("avatar.png", b"not an image", content_type="image/png")
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("image", response.data)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.image)
+
+    def test_variants_are_stored_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.patch_image(png_file())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(callbacks), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(set(self.user.image_variants), {"thumbnail", "medium"})
+
+    def test_deleting_the_account_releases_the_image(self):
+        self.patch_image(png_file())
+        stored = StoredFile.objects.get()
+        self.assertEqual(stored.ref_count, 1)
+        # request.user comes from CachedJWTAuthentication, image deferred
+        client = APIClient()
+        access = VersionedRefreshToken.for_user(self.user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        response = client.delete(f"/v1/users/profile/{self.user.pk}/")
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        stored.refresh_from_db()
+        self.assertEqual(stored.ref_count, 0)
+
+
+class RegistrationUniquenessTests(UserTestCase):
+    url = "/v1/users/register/client/"
+
+    def register(self, username="newclient", email="new@example.com"):
+        return self.api().post(
+            self.url,
+            {"username": username, "email": email, "password": "Passw0rd!"},
+        )
+
+    def test_taken_username_and_email_are_named(self):
+        response = self.register(username="client", email="client@example.com")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {"username", "email"})
+
+    def test_race_past_validation_is_a_bad_request(self):
+        original = UniqueUserFieldsMixin.conflicting_fields
+        calls = []
+
+        def conflicting_fields(serializer, attrs):
+            # the first check runs before the competing registration lands
+            calls.append(attrs)
+            return {} if len(calls) == 1 else original(serializer, attrs)
+
+        with mock.patch.object(
+            UniqueUserFieldsMixin, "conflicting_fields", conflicting_fields
+        ):
+            response = self.register(email="client@example.com")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {"email"})
+
+    def test_other_integrity_errors_are_raised(self):
+        with mock.patch.object(
+            User.objects, "create_user", side_effect=IntegrityError("NOT NULL")
+        ):
+            with self.assertRaises(IntegrityError):
+                self.register()
+
+
+class SkillTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.developers = []
+        for username, skills in (
+            ("pythonista", "Python"),
+            ("fullstack", "Python, Django, React"),
+            ("gopher", "Go"),
+        ):
+            developer = User.objects.create_user(
+                username, f"{username}@example.com", "Passw0rd!", is_developer=True
+            )
+            profile = DeveloperProfile.objects.create(
+                developer=developer, skills=skills
+            )
+            profile.sync_skills()
+            cls.developers.append(developer)
+
+    def skill_names(self, developer):
+        profile = DeveloperProfile.objects.get(developer=developer)
+        return set(profile.skill_set.values_list("name", flat=True))
+
+    def test_parse_skills(self):
+        self.assertEqual(
+            parse_skills("Python, Django;  REST   apis\npython,,DJANGO"),
+            ["python", "django", "rest apis"],
+        )
+        self.assertEqual(parse_skills("x" * 150), ["x" * 100])
+        self.assertEqual(parse_skills(None), [])
+        self.assertEqual(parse_skills(" ,; "), [])
+
+    def test_editing_skills_updates_skill_set(self):
+        developer = self.developers[0]
+        client = APIClient()
+        client.force_authenticate(developer)
+
+        client.patch(f"/v1/users/{developer.pk}/", {"skills": "Go; Rust, go"})
+
+        self.assertEqual(self.skill_names(developer), {"go", "rust"})
+        # the shared skill rows are reused, not duplicated
+        self.assertEqual(Skill.objects.filter(name="go").count(), 1)
+
+    def test_skills_filter_ranks_by_overlap(self):
+        client = APIClient()
+        client.force_authenticate(self.developers[2])
+
+        response = client.get("/v1/users/developers/", {"skills": "django, python"})
+
+        self.assertEqual(
+            [developer["username"] for developer in response.data["results"]],
+            ["fullstack", "pythonista"],
+        )
+
+
+class OutboxTests(TestCase):
+    def test_drain_sends_queued_mail(self):
+        email = queue_email("Hello", "Body", ["someone@example.com"])
+
+        outcome = drain_outbox()
+
+        self.assertEqual(outcome["Sent"], 1)
+        self.assertEqual(len(mail.outbox), 1)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("Sent", 1))
+
+    @override_settings(
+        EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+        EMAIL_HOST="127.0.0.1",
+        EMAIL_PORT=1,
+        EMAIL_USE_TLS=False,
+        EMAIL_TIMEOUT=1,
+    )
+    def test_unreachable_server_defers_mail(self):
+        self.assertEqual(drain_outbox(), {})
+
+        email = queue_email("Hello", "Body", ["someone@example.com"])
+        outcome = drain_outbox()
+
+        self.assertEqual(outcome["Deferred"], 1)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("Pending", 0))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertIn("Error", email.last_error)
+
+
+class UploadDedupTests(LocalUploadsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.developer = User.objects.create_user(
+            "developer", "developer@example.com", "Passw0rd!", is_developer=True
+        )
+        cls.profile = DeveloperProfile.objects.create(developer=cls.developer)
+
+    def patch_profile(self, **data):
+        client = APIClient()
+        client.force_authenticate(self.developer)
+        return client.patch(f"/v1/users/{self.developer.pk}/", data, format="multipart")
+
+    def resume(self, content=b"%PDF-1.4 resume"):
+        return SimpleUploadedFile("resume.pdf", content)
+
+    def test_invalid_request_stores_nothing(self):
+        response = self.patch_profile(resume=self.resume(), github="not a url")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(StoredFile.objects.exists())
+        self.assertEqual(os.listdir(settings.LOCAL_UPLOAD_ROOT), [])
+
+    def test_same_content_is_stored_once(self):
+        self.patch_profile(resume=self.resume())
+        self.patch_profile(resume=self.resume())
+
+        stored = StoredFile.objects.get()
+        self.assertEqual((stored.ref_count, stored.size), (1, 15))
+
+        self.patch_profile(resume=self.resume(b"%PDF-1.4 new resume"))
+
+        stored.refresh_from_db()
+        self.assertEqual(stored.ref_count, 0)
+        self.assertEqual(StoredFile.objects.count(), 2)
+        self.assertEqual(prune_stored_files(timedelta(0)), 1)
+        self.assertFalse(StoredFile.objects.filter(pk=stored.pk).exists())
+
+
+class DirectUploadTests(LocalUploadsMixin, TestCase):
+    content = b"%PDF-1.4 resume"
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.developer = User.objects.create_user(
+            "developer", "developer@example.com", "Passw0rd!", is_developer=True
+        )
+        cls.profile = DeveloperProfile.objects.create(developer=cls.developer)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.developer)
+
+    def sign(self, **data):
+        return self.client.post(
+            "/v1/users/uploads/", {"kind": "resume", **data}, format="json"
+        )
+
+    def send(self, params, **fields):
+        return APIClient().post(
+            params["url"],
+            {
+                **params["fields"],
+                **fields,
+                "file": SimpleUploadedFile("resume.pdf", self.content),
+            },
+            format="multipart",
+        )
+
+    def submit(self, resume):
+        return self.client.patch(
+            f"/v1/users/{self.developer.pk}/", {"resume": resume}, format="json"
+        )
+
+    def test_signed_upload_is_verified(self):
+        params = self.sign(sha256=self.sha256).data
+        self.assertFalse(params["existing"])
+        stored = self.send(params)
+        self.assertEqual(stored.status_code, 200)
+
+        response = self.submit({"upload": params["upload"], **stored.data})
+
+        self.assertEqual(response.status_code, 200)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.resume.public_id, stored.data["public_id"])
+        stored_file = StoredFile.objects.get()
+        self.assertEqual(
+            (stored_file.sha256, stored_file.size, stored_file.ref_count),
+            (self.sha256, len(self.content), 1),
+        )
+
+    def test_tampered_signatures_are_rejected(self):
+        params = self.sign().data
+
+        response = self.send(params, public_id="resumes/someone-else")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(os.listdir(settings.LOCAL_UPLOAD_ROOT), [])
+
+        stored = self.send(params).data
+        response = self.submit(
+            {"upload": params["upload"], **stored, "signature": "forged"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["resume"][0].code, "invalid_upload")
+        self.profile.refresh_from_db()
+        self.assertFalse(self.profile.resume)
+
+    def test_expired_parameters_and_tokens_are_rejected(self):
+        params = self.sign().data
+        later = time.time() + settings.UPLOAD_TOKEN_MAX_AGE + 1
+
+        with mock.patch("time.time", return_value=later):
+            response = self.send(params)
+        self.assertEqual(response.status_code, 400)
+
+        stored = self.send(params).data
+        with mock.patch("time.time", return_value=later):
+            response = self.submit({"upload": params["upload"], **stored})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["resume"][0].code, "upload_expired")
+
+    def test_stored_content_skips_the_upload(self):
+        params = self.sign(sha256=self.sha256).data
+        self.submit({"upload": params["upload"], **self.send(params).data})
+        stored_file = StoredFile.objects.get()
+
+        response = self.sign(sha256=self.sha256)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data["existing"])
+        self.assertNotIn("url", response.data)
+        self.assertNotIn("fields", response.data)
+
+        response = self.submit({"upload": response.data["upload"]})
+
+        self.assertEqual(response.status_code, 200)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.resume.get_prep_value(), stored_file.value)
+        stored_file.refresh_from_db()
+        self.assertEqual(stored_file.ref_count, 1)
+        self.assertEqual(StoredFile.objects.count(), 1)
+
+
+class CloudinaryStoreTests(TestCase):
+    result = {"public_id": "projects/spec", "version": 1, "resource_type": "raw"}
+
+    def store(self, content):
+        return CloudinaryUploadBackend().store(
+            "projects/spec", io.BytesIO(content), "pdf", "auto"
+        )
+
+    @mock.patch("users.uploads.LARGE_FILE_SIZE", 10)
+    def test_large_files_are_uploaded_in_parts(self):
+        with mock.patch(
+            "cloudinary.uploader.upload_large", return_value=self.result
+        ) as upload_large, mock.patch("cloudinary.uploader.upload") as upload:
+            value = self.store(b"x" * 11)
+
+        upload.assert_not_called()
+        self.assertEqual(upload_large.call_args.kwargs["public_id"], "projects/spec")
+        self.assertEqual(value, "raw/upload/v1/projects/spec")
+
+    @mock.patch("users.uploads.LARGE_FILE_SIZE", 10)
+    def test_small_files_are_uploaded_at_once(self):
+        with mock.patch(
+            "cloudinary.uploader.upload", return_value=self.result
+        ) as upload, mock.patch("cloudinary.uploader.upload_large") as upload_large:
+            self.store(b"x" * 10)
+
+        upload_large.assert_not_called()
+        self.assertEqual(upload.call_args.kwargs["resource_type"], "auto")
+
+
+class ChunkedUploadTests(LocalUploadsMixin, TestCase):
+    content = bytes(range(256)) * 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.developer = User.objects.create_user(
+            "developer", "developer@example.com", "Passw0rd!", is_developer=True
+        )
+
+    def setUp(self):
+        super().setUp()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        overrides = override_settings(CHUNKED_UPLOAD_ROOT=root, UPLOAD_CHUNK_SIZE=1000)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.developer)
+
+    def start(self, size=None):
+        return self.client.post(
+            "/v1/users/uploads/chunked/",
+            {"kind": "bid_file", "filename": "spec.pdf", "size": size or 2560},
+            format="json",
+        )
+
+    def put(self, url, start, end):
+        return self.client.put(
+            url,
+            self.content[start : end + 1],
+            content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {start}-{end}/{len(self.content)}",
+        )
+
+    def test_chunks_resume_from_offset(self):
+        url = f"/v1/users/uploads/chunked/{self.start().data['id']}/"
+
+        self.assertEqual(self.put(url, 0, 999).data["offset"], 1000)
+        # a repeated or skipped chunk is refused with the offset to resume from
+        response = self.put(url, 0, 999)
+        self.assertEqual((response.status_code, response.data), (409, {"offset": 1000}))
+        self.assertEqual(self.put(url, 2000, 2559).status_code, 409)
+        self.assertEqual(self.put(url, 1000, 2559).status_code, 400)
+        self.assertEqual(self.client.get(url).data["offset"], 1000)
+
+        finalize = self.client.post(f"{url}finalize/")
+        self.assertEqual((finalize.status_code, finalize.data), (409, {"offset": 1000}))
+
+        self.put(url, 1000, 1999)
+        self.put(url, 2000, 2559)
+        with self.captureOnCommitCallbacks(execute=True):
+            finalize = self.client.post(f"{url}finalize/")
+
+        self.assertEqual(finalize.status_code, 200)
+        upload = ChunkedUpload.objects.get()
+        self.assertFalse(os.path.exists(upload.path))
+        stored = StoredFile.objects.get()
+        self.assertEqual(stored.value, upload.value)
+        self.assertEqual(stored.size, len(self.content))
+
+        retry = self.client.post(f"{url}finalize/")
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(
+            signing.loads(retry.data["upload"], salt="users.uploads")["value"],
+            stored.value,
+        )
+
+    def test_chunk_raced_by_a_concurrent_copy_conflicts(self):
+        url = f"/v1/users/uploads/chunked/{self.start().data['id']}/"
+        write_chunk = chunked.write_chunk
+
+        def raced_write(upload, *args):
+            written = write_chunk(upload, *args)
+            # the same chunk, sent again on another connection, lands first
+            ChunkedUpload.objects.filter(pk=upload.pk).update(offset=written)
+            return written
+
+        with mock.patch("users.views.write_chunk", raced_write):
+            response = self.put(url, 0, 999)
+
+        self.assertEqual((response.status_code, response.data), (409, {"offset": 1000}))
+        self.assertEqual(self.put(url, 1000, 1999).data["offset"], 2000)
+
+    def test_temp_file_is_kept_until_commit(self):
+        url = f"/v1/users/uploads/chunked/{self.start(size=1000).data['id']}/"
+        self.content = self.content[:1000]
+        self.put(url, 0, 999)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(f"{url}finalize/")
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(os.path.exists(ChunkedUpload.objects.get().path))
+
+    def test_open_uploads_are_capped(self):
+        for _ in range(settings.CHUNKED_UPLOADS_PER_USER):
+            self.assertEqual(self.start().status_code, 201)
+
+        response = self.start()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ChunkedUpload.objects.count(), 3)
+
+    def test_other_users_uploads_are_hidden(self):
+        url = f"/v1/users/uploads/chunked/{self.start().data['id']}/"
+        other = User.objects.create_user("other", "other@example.com", "Passw0rd!")
+        client = APIClient()
+        client.force_authenticate(other)
+
+        self.assertEqual(client.get(url).status_code, 404)
+
+
+class TokenRevocationTests(UserTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def tokens(self):
+        refresh = VersionedRefreshToken.for_user(self.user)
+        return str(refresh), str(refresh.access_token)
+
+    def authed(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return client
+
+    def profile(self, access):
+        return self.authed(access).get(f"/v1/users/profile/{self.user.pk}/")
+
+    def refresh(self, refresh):
+        return APIClient().post(
+            "/v1/users/token/refresh/", {"refresh": refresh}, format="json"
+        )
+
+    def test_login_tokens_carry_the_version(self):
+        response = APIClient().post(
+            "/v1/users/login/",
+            {"email": "client@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.profile(response.data["access"]).status_code, 200)
+
+    def test_logout_revokes_the_refresh_token(self):
+        refresh, access = self.tokens()
+
+        response = self.authed(access).post(
+            "/v1/users/logout/", {"refresh": refresh}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+        # other sessions are untouched
+        self.assertEqual(self.profile(access).status_code, 200)
+
+    def test_logout_everywhere_revokes_every_token(self):
+        refresh, access = self.tokens()
+        other_refresh, other_access = self.tokens()
+
+        self.authed(access).post(
+            "/v1/users/logout/",
+            {"refresh": refresh, "everywhere": True},
+            format="json",
+        )
+
+        self.assertEqual(self.profile(other_access).status_code, 401)
+        self.assertEqual(self.refresh(other_refresh).status_code, 401)
+        # tokens issued afterwards work
+        self.user.refresh_from_db()
+        self.assertEqual(self.profile(self.tokens()[1]).status_code, 200)
+
+    def test_rotated_refresh_token_is_revoked(self):
+        refresh, _ = self.tokens()
+
+        response = self.refresh(refresh)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+        self.assertEqual(self.refresh(response.data["refresh"]).status_code, 200)
+
+    def test_prune_keeps_unexpired_tokens(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti="expired", expires_at=now - timedelta(1))
+        RevokedToken.objects.create(jti="current", expires_at=now + timedelta(1))
+
+        self.assertEqual(prune_revoked_tokens(chunk_size=1), 1)
+        self.assertEqual(
+            list(RevokedToken.objects.values_list("jti", flat=True)), ["current"]
+        )
+
+
+class DeveloperExportTests(UserTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser(
+            "admin", "admin@example.com", "Passw0rd!"
+        )
+        cls.developer = User.objects.create_user(
+            "developer", "developer@example.com", "Passw0rd!", is_developer=True
+        )
+        DeveloperProfile.objects.get_or_create(developer=cls.developer)
+
+    def test_view_streams_csv(self):
+        response = self.api(self.admin).get(
+            "/v1/users/developers/export/", {"output": "csv"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith("id,username,email"))
+        self.assertIn("developer", lines[1])
+
+    def test_command_writes_ndjson(self):
+        stdout = io.StringIO()
+
+        call_command("export_developers", stdout=stdout)
+
+        self.assertEqual(json.loads(stdout.getvalue())["username"], "developer")
+
+
+class CachedAuthenticationTests(LocalUploadsMixin, UserTestCase):
+    url = "/v1/hire/bids/?expand="
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        self.authenticate()
+
+    def authenticate(self):
+        self.user.refresh_from_db()
+        access = VersionedRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [q for q in queries if '"users_user"' in q["sql"]]
+
+    def cached_user(self):
+        self.client.get(self.url)
+        return cache.get(user_cache_key(self.user.pk))
+
+    def test_second_request_is_served_from_the_cache(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_save_delete_and_revocation_evict(self):
+        self.cached_user().save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+        self.cached_user()
+        revoke_user_tokens(self.user.pk)
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+        # tokens issued before the bump are revoked
+        self.authenticate()
+        self.cached_user().delete()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_saving_a_cached_user_keeps_deferred_fields(self):
+        self.api(self.user).patch(
+            f"/v1/users/profile/{self.user.pk}/",
+            {"image": png_file(), "about": "Hiring"},
+            format="multipart",
+        )
+        self.user.refresh_from_db()
+        image = self.user.image.get_prep_value()
+        stored = StoredFile.objects.get()
+
+        user = self.cached_user()
+        self.assertIn("image", user.get_deferred_fields())
+        user.firstname = "Ada"
+        user.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.firstname, "Ada")
+        self.assertEqual(self.user.about, "Hiring")
+        self.assertEqual(self.user.image.get_prep_value(), image)
+        stored.refresh_from_db()
+        self.assertEqual(stored.ref_count, 1)
+
+
+class AsyncAuthTests(UserTestCase):
+    def post(self, url, data):
+        return self.client.post(url, data, content_type="application/json")
+
+    def login(self, password="Passw0rd!", email="client@example.com"):
+        return self.post(
+            "/v1/users/async/login/", {"email": email, "password": password}
+        )
+
+    def test_register(self):
+        response = self.post(
+            "/v1/users/async/register/client/",
+            {
+                "username": "newclient",
+                "email": "new@example.com",
+                "password": "Passw0rd!",
+            },
+        )
+
+        self.assertEqual(response.status_code, 201, response.json())
+        self.assertIn("access", response.json())
+        user = User.objects.get(email="new@example.com")
+        self.assertTrue(user.is_client)
+        self.assertTrue(user.check_password("Passw0rd!"))
+
+    def test_register_taken_email(self):
+        response = self.post(
+            "/v1/users/async/register/client/",
+            {
+                "username": "newclient",
+                "email": "client@example.com",
+                "password": "Passw0rd!",
+            },
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("email", response.json())
+
+    def test_login(self):
+        response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {"refresh", "access"})
+
+    def test_invalid_credentials(self):
+        self.assertEqual(self.login(password="wrong").status_code, 401)
+        self.assertEqual(self.login(email="nobody@example.com").status_code, 401)
+        self.assertEqual(self.post("/v1/users/async/login/", {}).status_code, 400)
+
+    @override_settings(PASSWORD_HASHERS=settings.PASSWORD_HASHER_TIERS["argon2"])
+    def test_login_upgrades_legacy_hashes(self):
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+        self.assertEqual(self.login().status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("argon2$"))
+        self.assertEqual(self.login().status_code, 200)
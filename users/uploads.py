@@ -0,0 +1,471 @@
+"""
+Direct-to-storage uploads
+
+Files no longer have to stream through the API workers:
+
+1. POST /v1/users/uploads/ {"kind": "image"} returns short-lived signed
+   upload parameters (url and fields) and an upload token,
+2. the client sends the file straight to that url with those fields,
+3. the client submits {"upload": token, "version": ..., "signature": ...}
+   from the storage response as the file field. UploadField verifies it and
+   only the resulting public ID is recorded.
+
+Uploads are content-addressed per owner: files received by the worker are
+hashed (SHA-256, streamed chunk by chunk) and stored once as
+<folder>/<owner>/<sha256>, a StoredFile row records them and counts the
+file fields referencing them. Direct uploads may pass the sha256 when
+signing; when that content is already stored the response carries only an
+upload token for the existing file and nothing has to be uploaded.
+Unreferenced files are deleted by prune_stored_files.
+
+settings.UPLOAD_BACKEND is Cloudinary in deployments, LocalUploadBackend
+(files under LOCAL_UPLOAD_ROOT) stands in for it locally and in tests.
+"""
+
+import hashlib
+import io
+import os
+import re
+import shutil
+import time
+import urllib.request
+import uuid
+from datetime import timedelta
+
+import cloudinary
+import cloudinary.uploader
+import cloudinary.utils
+from cloudinary import CloudinaryResource
+from cloudinary.models import CloudinaryField
+from django.conf import settings
+from django.core import signing
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+from django.utils import timezone
+from rest_framework import serializers
+
+from users.models import StoredFile
+
+# kind: (folder, resource type)
+UPLOAD_KINDS = {
+    "image": ("images", "image"),
+    "resume": ("resumes", "auto"),
+    "project_file": ("projects", "auto"),
+    "bid_file": ("proposals", "auto"),
+}
+RESOURCE_TYPES = ("image", "raw", "video")
+IMAGE_FORMATS = ("jpg", "jpeg", "png", "gif", "webp", "bmp", "tiff")
+FORMAT_RE = re.compile(r"[a-z0-9]{1,10}")
+SHA256_RE = re.compile(r"[0-9a-f]{64}")
+LARGE_FILE_SIZE = 20 * 1024 * 1024
+LARGE_FILE_CHUNK_SIZE = 6 * 1024 * 1024
+TOKEN_SALT = "users.uploads"
+# unreferenced files are kept this long, the upload may not be saved yet
+STORED_FILE_GRACE = timedelta(days=1)
+
+
+def get_upload_backend():
+    return import_string(settings.UPLOAD_BACKEND)()
+
+
+def absolute_url(context, url):
+    request = context.get("request", None)
+    if url and request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def new_public_id(kind: str) -> str:
+    folder, _ = UPLOAD_KINDS[kind]
+    return f"{folder}/{uuid.uuid4().hex}"
+
+
+def content_public_id(user, kind: str, sha256: str) -> str:
+    folder, _ = UPLOAD_KINDS[kind]
+    return f"{folder}/{user.pk.hex}/{sha256}"
+
+
+def file_format(name: str) -> str:
+    extension = os.path.splitext(name or "")[1].lstrip(".").lower()
+    return extension if FORMAT_RE.fullmatch(extension) else ""
+
+
+def resolve_resource_type(resource_type: str, extension: str) -> str:
+    if resource_type == "auto":
+        return "image" if extension in IMAGE_FORMATS else "raw"
+    return resource_type
+
+
+def file_digest(uploaded) -> str:
+    """
+    Hex SHA-256 of an uploaded file, read one chunk at a time
+    """
+    digest = hashlib.sha256()
+    for chunk in uploaded.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def upload_token(user, kind: str, public_id: str, **extra) -> str:
+    return signing.dumps(
+        {"user": str(user.pk), "kind": kind, "public_id": public_id, **extra},
+        salt=TOKEN_SALT,
+    )
+
+
+def read_upload_token(token, user, kind: str) -> dict:
+    try:
+        payload = signing.loads(
+            token or "", salt=TOKEN_SALT, max_age=settings.UPLOAD_TOKEN_MAX_AGE
+        )
+    except signing.SignatureExpired:
+        raise serializers.ValidationError(
+            "Upload token has expired.", code="upload_expired"
+        )
+    except signing.BadSignature:
+        raise serializers.ValidationError(
+            "Invalid upload token.", code="invalid_upload"
+        )
+    if payload["user"] != str(getattr(user, "pk", "")) or payload["kind"] != kind:
+        raise serializers.ValidationError(
+            "Invalid upload token.", code="invalid_upload"
+        )
+    return payload
+
+
+def signed_upload(user, kind: str, sha256: str = None) -> dict:
+    """
+    Upload parameters for one new file of this kind, or with the sha256
+    of content the user already stored, a token referencing that file
+    """
+    if sha256:
+        stored = StoredFile.objects.filter(owner=user, sha256=sha256).first()
+        if stored is not None:
+            return {
+                "upload": upload_token(
+                    user, kind, None, sha256=sha256, value=stored.value
+                ),
+                "expires_in": settings.UPLOAD_TOKEN_MAX_AGE,
+                "existing": True,
+            }
+
+    _, resource_type = UPLOAD_KINDS[kind]
+    if sha256:
+        public_id = content_public_id(user, kind, sha256)
+    else:
+        public_id = new_public_id(kind)
+    return {
+        "upload": upload_token(user, kind, public_id, sha256=sha256),
+        "expires_in": settings.UPLOAD_TOKEN_MAX_AGE,
+        "existing": False,
+        **get_upload_backend().upload_params(public_id, resource_type),
+    }
+
+
+_file_field = CloudinaryField()
+
+
+def record_stored_file(user, sha256: str, value: str, size: int = 0) -> str:
+    """
+    Record a stored upload, returns the value to reference: the
+    existing one if the same content was recorded concurrently
+    """
+    with transaction.atomic():
+        stored, _ = StoredFile.objects.get_or_create(
+            owner=user, sha256=sha256, defaults={"value": value, "size": size or 0}
+        )
+    return stored.value
+
+
+def store_upload(user, kind: str, uploaded):
+    """
+    Store a file received by the worker unless the user already stored
+    the same content, returns the CloudinaryResource to save
+    """
+    sha256 = file_digest(uploaded)
+    stored = StoredFile.objects.filter(owner=user, sha256=sha256).first()
+    if stored is not None:
+        value = stored.value
+    else:
+        _, resource_type = UPLOAD_KINDS[kind]
+        uploaded.seek(0)
+        value = get_upload_backend().store(
+            content_public_id(user, kind, sha256),
+            uploaded,
+            file_format(uploaded.name),
+            resource_type,
+        )
+        value = record_stored_file(user, sha256, value, uploaded.size)
+    resource = _file_field.to_python(value)
+    # the content, for callers that process it further (image variants)
+    resource.uploaded_file = uploaded
+    return resource
+
+
+def prune_stored_files(grace=STORED_FILE_GRACE, limit=None) -> int:
+    """
+    Delete files no field has referenced for the grace period,
+    from the storage and then their rows
+    """
+    backend = get_upload_backend()
+    files = StoredFile.objects.filter(
+        ref_count=0, updated_at__lt=timezone.now() - grace
+    ).order_by("updated_at")
+    if limit:
+        files = files[:limit]
+    deleted = 0
+    for pk, value in files.values_list("pk", "value").iterator():
+        # referenced again since it was selected
+        if not StoredFile.objects.filter(pk=pk, ref_count=0).delete()[0]:
+            continue
+        backend.delete(_file_field.to_python(value))
+        deleted += 1
+    return deleted
+
+
+class CloudinaryUploadBackend:
+    """
+    Files over LARGE_FILE_SIZE are stored with Cloudinary's chunked upload API
+    """
+
+    def upload_params(self, public_id: str, resource_type: str) -> dict:
+        config = cloudinary.config()
+        fields = {"public_id": public_id, "timestamp": int(time.time())}
+        fields["signature"] = cloudinary.utils.api_sign_request(
+            fields, config.api_secret
+        )
+        fields["api_key"] = config.api_key
+        return {
+            "url": cloudinary.utils.cloudinary_api_url(
+                "upload", resource_type=resource_type
+            ),
+            "fields": fields,
+        }
+
+    def verify(self, public_id: str, version: str, signature: str) -> bool:
+        return cloudinary.utils.verify_api_response_signature(
+            public_id, version, signature
+        )
+
+    def url(self, resource) -> str:
+        return resource.url
+
+    def open(self, resource):
+        with urllib.request.urlopen(resource.url, timeout=30) as response:
+            return io.BytesIO(response.read())
+
+    def store(
+        self, public_id: str, content, file_format: str, resource_type="image"
+    ) -> str:
+        """
+        Upload a file object (e.g. image variants, files received
+        by the worker) under public_id
+        """
+        options = {
+            "public_id": public_id,
+            "resource_type": resource_type,
+            "overwrite": True,
+        }
+        size = content.seek(0, os.SEEK_END)
+        content.seek(0)
+        if size > LARGE_FILE_SIZE:
+            # sent in parts, one request can not carry more than 100 MB
+            result = cloudinary.uploader.upload_large(
+                content, chunk_size=LARGE_FILE_CHUNK_SIZE, **options
+            )
+        else:
+            result = cloudinary.uploader.upload(content, **options)
+        return CloudinaryResource(
+            public_id=result["public_id"],
+            version=str(result["version"]),
+            format=result.get("format"),
+            resource_type=result["resource_type"],
+            type="upload",
+        ).get_prep_value()
+
+    def delete(self, resource) -> None:
+        cloudinary.uploader.destroy(
+            resource.public_id, resource_type=resource.resource_type, invalidate=True
+        )
+
+
+class LocalUploadBackend:
+    """
+    Filesystem stand-in for Cloudinary's signed upload API.
+    Files are posted to the local-upload endpoint and stored
+    under LOCAL_UPLOAD_ROOT, served from LOCAL_UPLOAD_URL.
+    """
+
+    def sign(self, params: dict) -> str:
+        value = "&".join(f"{key}={params[key]}" for key in sorted(params))
+        return signing.Signer(salt=f"{TOKEN_SALT}.local").signature(value)
+
+    def upload_params(self, public_id: str, resource_type: str) -> dict:
+        fields = {
+            "public_id": public_id,
+            "resource_type": resource_type,
+            "timestamp": int(time.time()),
+        }
+        fields["signature"] = self.sign(fields)
+        return {"url": reverse("local-upload"), "fields": fields}
+
+    def path(self, public_id: str, file_format: str) -> str:
+        name = f"{public_id}.{file_format}" if file_format else public_id
+        return os.path.join(settings.LOCAL_UPLOAD_ROOT, name)
+
+    def receive(self, fields, uploaded) -> dict:
+        """
+        Store a file posted to the local-upload endpoint,
+        answers like Cloudinary's upload API
+        """
+        signed = {
+            key: fields.get(key, "")
+            for key in ("public_id", "resource_type", "timestamp")
+        }
+        if not constant_time_compare(fields.get("signature", ""), self.sign(signed)):
+            raise serializers.ValidationError("Invalid signature.")
+        if (
+            not signed["timestamp"].isdigit()
+            or time.time() - int(signed["timestamp"]) > settings.UPLOAD_TOKEN_MAX_AGE
+        ):
+            raise serializers.ValidationError("Upload parameters have expired.")
+
+        extension = file_format(uploaded.name)
+        resource_type = resolve_resource_type(signed["resource_type"], extension)
+        path = self.path(signed["public_id"], extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as destination:
+            for chunk in uploaded.chunks():
+                destination.write(chunk)
+
+        version = str(int(time.time()))
+        return {
+            "public_id": signed["public_id"],
+            "version": version,
+            "signature": self.sign(
+                {"public_id": signed["public_id"], "version": version}
+            ),
+            "format": extension,
+            "resource_type": resource_type,
+            "bytes": uploaded.size,
+        }
+
+    def verify(self, public_id: str, version: str, signature: str) -> bool:
+        expected = self.sign({"public_id": public_id, "version": version})
+        return constant_time_compare(signature, expected)
+
+    def url(self, resource) -> str:
+        name = resource.public_id
+        if resource.format:
+            name = f"{name}.{resource.format}"
+        return f"{settings.LOCAL_UPLOAD_URL}{name}"
+
+    def open(self, resource):
+        return open(self.path(resource.public_id, resource.format), "rb")
+
+    def store(
+        self, public_id: str, content, file_format: str, resource_type="image"
+    ) -> str:
+        path = self.path(public_id, file_format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as destination:
+            shutil.copyfileobj(content, destination)
+        return CloudinaryResource(
+            public_id=public_id,
+            version=str(int(time.time())),
+            format=file_format or None,
+            resource_type=resolve_resource_type(resource_type, file_format),
+            type="upload",
+        ).get_prep_value()
+
+    def delete(self, resource) -> None:
+        try:
+            os.remove(self.path(resource.public_id, resource.format))
+        except FileNotFoundError:
+            pass
+
+
+class UploadField(serializers.FileField):
+    """
+    File field that also accepts a verified direct upload,
+    {"upload": token, "version": ..., "signature": ..., "format": ...,
+    "resource_type": ...} as returned by the storage, or {"upload": token}
+    for a token referencing an already stored file.
+    Multipart files are still accepted, see StoreUploadsMixin.
+    """
+
+    def __init__(self, kind: str, **kwargs):
+        self.kind = kind
+        kwargs.setdefault("use_url", True)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, dict):
+            # stored by StoreUploadsMixin.save() once the whole payload is valid
+            return super().to_internal_value(data)
+
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+        payload = read_upload_token(data.get("upload"), user, self.kind)
+        if payload.get("value"):
+            return _file_field.to_python(payload["value"])
+        version = str(data.get("version", ""))
+        if not version.isdigit() or not get_upload_backend().verify(
+            payload["public_id"], version, str(data.get("signature", ""))
+        ):
+            raise serializers.ValidationError(
+                "Upload could not be verified.", code="invalid_upload"
+            )
+
+        _, resource_type = UPLOAD_KINDS[self.kind]
+        if data.get("resource_type") in RESOURCE_TYPES:
+            resource_type = data["resource_type"]
+        elif resource_type == "auto":
+            resource_type = "raw"
+        extension = str(data.get("format") or "").lower()
+        resource = CloudinaryResource(
+            public_id=payload["public_id"],
+            version=version,
+            format=extension if FORMAT_RE.fullmatch(extension) else None,
+            resource_type=resource_type,
+            type="upload",
+        )
+        if payload.get("sha256"):
+            size = data.get("bytes")
+            value = record_stored_file(
+                user,
+                payload["sha256"],
+                resource.get_prep_value(),
+                size if isinstance(size, int) and size > 0 else 0,
+            )
+            resource = _file_field.to_python(value)
+        return resource
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return absolute_url(self.context, get_upload_backend().url(value))
+
+
+class StoreUploadsMixin:
+    """
+    For serializers with UploadFields: multipart files are only stored
+    (content-addressed, see store_upload) by save(), after the whole
+    payload validated. Without an authenticated user they are left to
+    CloudinaryField's own upload.
+    """
+
+    def save(self, **kwargs):
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            for field in self.fields.values():
+                value = self.validated_data.get(field.source)
+                if isinstance(field, UploadField) and isinstance(value, UploadedFile):
+                    self.validated_data[field.source] = store_upload(
+                        user, field.kind, value
+                    )
+        return super().save(**kwargs)
@@ -4,6 +4,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 
+from users import async_views
 from users.views import (
     UserRegister,
     UserDetailView,
@@ -11,35 +12,77 @@ from users.views import (
     DeveloperListView,
     DeveloperProfileDetailView,
     DeveloperProfileListView,
+    DeveloperExportView,
     ClientDeveloperProfileView,
     LogoutView,
-    VerifyEmailView
+    LocalUploadView,
+    UploadSignView,
+    ChunkedUploadCreateView,
+    ChunkedUploadView,
+    ChunkedUploadFinalizeView,
+    VerifyEmailView,
 )
 
 urlpatterns = [
     path("login/", TokenObtainPairView.as_view(), name="login"),
     path("logout/", LogoutView.as_view(), name="logout"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    # direct-to-storage uploads
+    path("uploads/", UploadSignView.as_view(), name="upload-sign"),
+    path("uploads/local/", LocalUploadView.as_view(), name="local-upload"),
+    # resumable chunked uploads
+    path(
+        "uploads/chunked/",
+        ChunkedUploadCreateView.as_view(),
+        name="chunked-upload-create",
+    ),
+    path(
+        "uploads/chunked/<uuid:pk>/", ChunkedUploadView.as_view(), name="chunked-upload"
+    ),
+    path(
+        "uploads/chunked/<uuid:pk>/finalize/",
+        ChunkedUploadFinalizeView.as_view(),
+        name="chunked-upload-finalize",
+    ),
     # clients
     path("register/client/", UserRegister.as_view(), name="user-create"),
     path("profile/<str:id>/", UserDetailView.as_view(), name="user-detail"),
     path(
-        "developers/<str:developer>/",
-        ClientDeveloperProfileView.as_view(),
-        name="developer-profile",
+        "verify-email/<str:uidb64>/<str:token>/",
+        VerifyEmailView.as_view(),
+        name="verify-email",
     ),
-    path("verify-email/<str:uidb64>/<str:token>/", VerifyEmailView.as_view(), name="verify-email"),
     # developers
     path("register/developer/", DeveloperRegister.as_view(), name="developer-create"),
-    path(
-        "<str:developer>/",
-        DeveloperProfileDetailView.as_view(),
-        name="developer-detail",
-    ),
+    # fixed paths must come before the <str:developer> patterns that would shadow them
     path("developers/", DeveloperListView.as_view(), name="developers"),
     path(
         "developers/profile/",
         DeveloperProfileListView.as_view(),
+        name="developer-profile-list",
+    ),
+    path("developers/export/", DeveloperExportView.as_view(), name="developer-export"),
+    # async variants, for ASGI deployments
+    path("async/login/", async_views.login, name="async-login"),
+    path(
+        "async/register/client/",
+        async_views.client_register,
+        name="async-user-create",
+    ),
+    path("async/developers/", async_views.developer_list, name="async-developers"),
+    path(
+        "async/developers/<str:developer>/",
+        async_views.developer_profile,
+        name="async-developer-profile",
+    ),
+    path(
+        "developers/<str:developer>/",
+        ClientDeveloperProfileView.as_view(),
         name="developer-profile",
     ),
+    path(
+        "<str:developer>/",
+        DeveloperProfileDetailView.as_view(),
+        name="developer-detail",
+    ),
 ]
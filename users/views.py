@@ -1,21 +1,40 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework import generics, status
+from django.db.models.functions import Greatest
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters, generics, status
 from rest_framework.generics import GenericAPIView
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from users.models import DeveloperProfile
+from users.chunked import (
+    active_uploads,
+    advance_offset,
+    finalize_upload,
+    parse_content_range,
+    write_chunk,
+)
+from users.models import DeveloperProfile, match_skills
 from users.serializers import (
+    ChunkedUploadSerializer,
     UserSerializer,
     DeveloperProfileSerializer,
     DeveloperSerializer,
     LogoutSerializer,
+    UploadSignSerializer,
     VerifyEmailSerializer,
 )
+from users.filters import DeveloperFilter
+from hireadeveloper.exports import ExportView
+from users.exports import DEVELOPER_COLUMNS, developer_export_queryset
+from users.mixins import ConditionalRetrieveMixin
+from hireadeveloper.pagination import OptionalCursorPagination
 from users.permissions import IsUser, IsDeveloper
+from users.revocation import VersionedRefreshToken
+from users.uploads import LocalUploadBackend, get_upload_backend, signed_upload
 
 User = get_user_model()
 
@@ -44,7 +63,7 @@ class UserRegister(APIView):
         serializer = UserSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = VersionedRefreshToken.for_user(user)
         response = serializer.data
         response["refresh"] = str(refresh)
         response["access"] = str(refresh.access_token)
@@ -67,14 +86,24 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
         )
 
 
-class ClientDeveloperProfileView(generics.RetrieveAPIView):
+class ClientDeveloperProfileView(ConditionalRetrieveMixin, generics.RetrieveAPIView):
     serializer_class = DeveloperProfileSerializer
-    queryset = DeveloperProfile.objects.all()
+    queryset = DeveloperProfile.objects.select_related("developer")
     lookup_field = "developer"
     permission_classes = [
         IsAuthenticated,
     ]
 
+    def get_modified_state(self, queryset):
+        # the profile shows the developer's username
+        return (
+            queryset.annotate(
+                last_modified=Greatest("updated_at", "developer__updated_at")
+            )
+            .values_list("last_modified")
+            .first()
+        )
+
     # def get_object(self):
     #     username = self.kwargs.get("username")
     #     return self.get_queryset().get(developer__username=username)
@@ -117,7 +146,7 @@ class DeveloperRegister(APIView):
         )
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = VersionedRefreshToken.for_user(user)
         response = serializer.data
         response["refresh"] = str(refresh)
         response["access"] = str(refresh.access_token)
@@ -127,8 +156,15 @@ class DeveloperRegister(APIView):
 
 class DeveloperListView(generics.ListAPIView):
     serializer_class = DeveloperSerializer
-    queryset = User.objects.filter(is_developer=True)
     permission_classes = (IsAuthenticated,)
+    pagination_class = OptionalCursorPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_class = DeveloperFilter
+    ordering_fields = ["created_at"]
+
+    def get_queryset(self):
+        queryset = User.objects.filter(is_developer=True)
+        return match_skills(queryset, self.request.query_params.get("skills"))
 
 
 class DeveloperProfileDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -147,6 +183,12 @@ class DeveloperProfileListView(generics.ListAPIView):
     permission_classes = (IsAuthenticated,)
 
 
+class DeveloperExportView(ExportView):
+    export_name = "developers"
+    columns = DEVELOPER_COLUMNS
+    queryset_factory = developer_export_queryset
+
+
 """
 Logout
 """
@@ -163,3 +205,112 @@ class LogoutView(GenericAPIView):
         serializer.save()
 
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+"""
+Uploads
+-signed parameters for direct-to-storage uploads
+-local stand-in for the storage upload API
+-resumable chunked uploads
+"""
+
+
+class UploadSignView(GenericAPIView):
+    serializer_class = UploadSignSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request: Request) -> Response:
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = signed_upload(
+            request.user,
+            serializer.validated_data["kind"],
+            serializer.validated_data.get("sha256"),
+        )
+        if "url" in params:
+            params["url"] = request.build_absolute_uri(params["url"])
+        return Response(params, status=status.HTTP_201_CREATED)
+
+
+class LocalUploadView(APIView):
+    """
+    Only routed to LocalUploadBackend, the signed fields authorize the upload
+    """
+
+    authentication_classes = ()
+    permission_classes = ()
+    parser_classes = (MultiPartParser,)
+
+    def post(self, request: Request) -> Response:
+        backend = get_upload_backend()
+        if not isinstance(backend, LocalUploadBackend):
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        uploaded = request.FILES.get("file")
+        if uploaded is None:
+            return Response(
+                {"file": ["No file was submitted."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(backend.receive(request.data, uploaded))
+
+
+class ChunkedUploadCreateView(generics.CreateAPIView):
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def perform_create(self, serializer):
+        serializer.save(owner=self.request.user)
+
+
+class ChunkedUploadView(generics.RetrieveAPIView):
+    """
+    GET the offset to resume from, PUT the next chunk (see users.chunked)
+    """
+
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return active_uploads(self.request.user)
+
+    def put(self, request: Request, pk) -> Response:
+        upload = generics.get_object_or_404(self.get_queryset(), pk=pk)
+        if upload.value:
+            return self.finalized()
+        start, length = parse_content_range(
+            request.headers.get("Content-Range"),
+            request.META.get("CONTENT_LENGTH"),
+            upload,
+        )
+        if start != upload.offset:
+            return Response({"offset": upload.offset}, status=status.HTTP_409_CONFLICT)
+        # the offset only moves forward, so the write never goes past it
+        written = write_chunk(upload, request.stream, start, length)
+        if written and not advance_offset(upload, start, written):
+            # a concurrent copy of the chunk got there first
+            if upload.value:
+                return self.finalized()
+            return Response({"offset": upload.offset}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(upload).data)
+
+    def finalized(self) -> Response:
+        return Response(
+            {"detail": "This upload is already finalized."},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+
+class ChunkedUploadFinalizeView(GenericAPIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return active_uploads(self.request.user)
+
+    def post(self, request: Request, pk) -> Response:
+        # no lock is held while the file goes to the storage, concurrent
+        # finalizes store the same content-addressed file
+        upload = generics.get_object_or_404(self.get_queryset(), pk=pk)
+        if upload.offset < upload.size:
+            return Response({"offset": upload.offset}, status=status.HTTP_409_CONFLICT)
+        token = finalize_upload(upload)
+        return Response({"upload": token, "expires_in": settings.UPLOAD_TOKEN_MAX_AGE})